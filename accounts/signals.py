@@ -1,6 +1,7 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import User, Profile
+from core.images import schedule_variants
 
 @receiver(post_save, sender=User)
 def create_profile_for_new_user(sender, instance, created, **kwargs):
@@ -16,3 +17,8 @@ def save_profile_for_user(sender, instance, **kwargs):
             instance.profile.save()
     else:
         Profile.objects.create(user=instance, phone=instance.phone or "")
+
+
+@receiver(post_save, sender=Profile)
+def profile_avatar_variants(sender, instance, **kwargs):
+    schedule_variants(instance.avatar)
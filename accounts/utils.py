@@ -1,4 +1,5 @@
 import random
+import re
 import string
 
 def generate_username_from_phone(phone):
@@ -15,3 +16,13 @@ def generate_unique_username(user_model, base_username):
         suffix += 1
         username = f"{base_username}_{suffix}"
     return username
+
+def normalize_bd_phone(phone):
+    """
+    Digits only, in local form: "+880 1712-345678" and "01712345678" both
+    become "01712345678". Used for indexed phone lookups.
+    """
+    digits = re.sub(r"\D", "", phone or "")
+    if digits.startswith("880"):
+        digits = digits[2:]
+    return digits
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_panel.exports import STREAMERS
+from admin_panel.order_filters import parse_order_filters
+
+
+class Command(BaseCommand):
+    help = "Stream orders with their items as CSV, XLSX or JSONL (same filters as the admin order list)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(STREAMERS), default="csv")
+        parser.add_argument("--output", "-o", help="File to write; defaults to stdout")
+        parser.add_argument("--search", default="", help="Order id, phone, email or name prefix")
+        parser.add_argument("--status", default="", help="Payment status")
+        parser.add_argument("--date-from", default=None, help="YYYY-MM-DD, inclusive")
+        parser.add_argument("--date-to", default=None, help="YYYY-MM-DD, inclusive")
+
+    def handle(self, *args, **options):
+        filters = parse_order_filters({
+            "search": options["search"],
+            "status": options["status"],
+            "date_from": options["date_from"],
+            "date_to": options["date_to"],
+        })
+        if options["format"] == "xlsx" and not options["output"]:
+            raise CommandError("XLSX is binary; pass --output.")
+
+        chunks = STREAMERS[options["format"]](filters)
+        if options["output"]:
+            mode = "wb" if options["format"] == "xlsx" else "w"
+            encoding = None if mode == "wb" else "utf-8"
+            with open(options["output"], mode, encoding=encoding, newline="" if mode == "w" else None) as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,92 @@
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.utils import normalize_bd_phone
+from core.models import Order
+
+# ?sort= value -> (field, descending), for core.pagination.keyset_paginate
+ORDER_SORTS = {
+    '-created_at': ('created_at', True),
+    'created_at': ('created_at', False),
+    '-total': ('total', True),
+    'total': ('total', False),
+    '-id': ('id', True),
+    'id': ('id', False),
+}
+DEFAULT_ORDER_SORT = '-created_at'
+ORDER_PAGE_SIZE = 25
+
+PAYMENT_STATUSES = {value for value, _ in Order._meta.get_field('payment_status').choices}
+
+
+def _prefix_range(field, prefix):
+    # [prefix, prefix with last char bumped) is a plain index range scan;
+    # LIKE 'prefix%' can't use the index on SQLite.
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+def search_q(text):
+    """
+    Indexed search only:
+      "1234" / "#1234"      exact order id, or phone prefix
+      "+880171..." / "0171" phone prefix on mobile_normalized
+      "a@b.com"             exact email
+      anything else         first / last name prefix, case-insensitive
+                            (on the indexed *_lower columns)
+    """
+    text = text.strip()
+    if not text:
+        return Q()
+
+    bare = text.lstrip('#')
+    if bare.isdigit() or (text.startswith('+') and bare[1:].isdigit()):
+        q = Q()
+        if bare.isdigit() and len(bare) <= 9:
+            q |= Q(pk=int(bare))
+        phone = normalize_bd_phone(bare)
+        if len(phone) >= 3:
+            q |= _prefix_range('mobile_normalized', phone)
+        return q or Q(pk=None)
+
+    if '@' in text:
+        return Q(email=text) | Q(email=text.lower())
+
+    name = text.lower()
+    return _prefix_range('first_name_lower', name) | _prefix_range('last_name_lower', name)
+
+
+def _parse_date(raw):
+    try:
+        return date.fromisoformat(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_order_filters(params):
+    """Filters shared by the order list and the export: search, status, date range."""
+    status = (params.get('status') or '').strip()
+    return {
+        'search': (params.get('search') or '').strip(),
+        'status': status if status in PAYMENT_STATUSES else '',
+        'date_from': _parse_date(params.get('date_from')),
+        'date_to': _parse_date(params.get('date_to')),
+    }
+
+
+def filter_orders(filters, queryset=None):
+    qs = Order.objects.all() if queryset is None else queryset
+    if filters['search']:
+        qs = qs.filter(search_q(filters['search']))
+    if filters['status']:
+        qs = qs.filter(payment_status=filters['status'])
+
+    tz = timezone.get_current_timezone()
+    if filters['date_from']:
+        qs = qs.filter(created_at__gte=datetime.combine(filters['date_from'], time.min, tzinfo=tz))
+    if filters['date_to']:
+        end = datetime.combine(filters['date_to'] + timedelta(days=1), time.min, tzinfo=tz)
+        qs = qs.filter(created_at__lt=end)
+    return qs
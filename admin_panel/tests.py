@@ -1,3 +1,110 @@
+import csv
+import io
+import json
+import zipfile
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from core import rollups
+from core.models import Job, Order, OrderItem
+from core.query_plans import analyze_query
+
+from .order_filters import filter_orders, parse_order_filters
+
+
+def make_order(first_name, last_name, mobile='01711111111'):
+    return Order.objects.create(
+        first_name=first_name, last_name=last_name, address='Road 1', mobile=mobile,
+        email='buyer@example.com', upazila='Mirpur', district='Dhaka',
+        delivery_method='home', payment_method='cod', subtotal=100, total=100,
+    )
+
+
+class OrderNameSearchTests(TestCase):
+    def setUp(self):
+        self.alice = make_order('Alice', 'Rahman')
+        self.ali = make_order('Karim', 'ALIMUDDIN')
+        make_order('Kalina', 'Hossain')
+
+    def search(self, text):
+        return filter_orders(parse_order_filters({'search': text}))
+
+    def test_name_prefix_matches_first_or_last_name_case_insensitively(self):
+        self.assertEqual(set(self.search('ali')), {self.alice, self.ali})
+        self.assertEqual(set(self.search('RAH')), {self.alice})
+
+    def test_name_search_uses_the_indexes(self):
+        sql, params = self.search('ali').query.sql_with_params()
+        report = analyze_query(sql, params)
+        self.assertEqual(report['problems'], [], report['plan'])
+
+
+class UpdatePaymentTests(TestCase):
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser(username='admin', password='secret-pass')
+        self.client.force_login(admin)
+        self.order = make_order('Alice', 'Rahman')
+        rollups.rebuild()
+        self.url = f'/adminpanel/orders/{self.order.pk}/update-payment/'
+
+    def test_status_change_moves_the_order_between_rollup_buckets(self):
+        response = self.client.post(self.url, {'amount_paid': '100', 'payment_status': 'paid'})
+
+        self.assertRedirects(response, f'/adminpanel/orders/{self.order.pk}/', fetch_redirect_response=False)
+        self.assertEqual(rollups.totals('pending')['count'], 0)
+        self.assertEqual(rollups.totals('paid'), {'count': 1, 'revenue': 100})
+        self.assertTrue(Job.objects.filter(name='orders.payment_updated').exists())
+
+    def test_bad_amount_rerenders_the_form(self):
+        for amount in ('abc', '-5', 'nan'):
+            with self.subTest(amount=amount):
+                response = self.client.post(self.url, {'amount_paid': amount, 'payment_status': 'paid'})
+                self.assertEqual(response.status_code, 400)
+                self.assertContains(response, 'Amount paid must be a number', status_code=400)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, 'pending')
+        self.assertEqual(rollups.totals('pending')['count'], 1)
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser(username='admin', password='secret-pass')
+        self.client.force_login(admin)
+        self.paid = make_order('Alice', 'Rahman')
+        Order.objects.filter(pk=self.paid.pk).update(payment_status='paid')
+        OrderItem.objects.create(order=self.paid, product_name='Phone', price=60, qty=1)
+        OrderItem.objects.create(order=self.paid, product_name='Case', price=20, qty=2)
+        make_order('Karim', 'Hossain')
+
+    def export(self, fmt, **params):
+        response = self.client.get('/adminpanel/orders/export/', {'format': fmt, **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_csv_has_one_row_per_item_and_honours_filters(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('csv', status='paid').decode())))
+        self.assertEqual(
+            [(r['order_id'], r['item_product_name']) for r in rows],
+            [(str(self.paid.pk), 'Phone'), (str(self.paid.pk), 'Case')],
+        )
+
+    def test_jsonl_nests_items_per_order(self):
+        records = [json.loads(line) for line in self.export('jsonl').decode().splitlines()]
+        self.assertEqual([r['first_name'] for r in records], ['Alice', 'Karim'])
+        self.assertEqual(records[0]['items'], [
+            {'product_name': 'Phone', 'price': 60.0, 'qty': 1},
+            {'product_name': 'Case', 'price': 20.0, 'qty': 2},
+        ])
+        self.assertEqual(records[1]['items'], [])
+
+    def test_xlsx_is_a_readable_workbook(self):
+        Order.objects.filter(pk=self.paid.pk).update(address='Road\x001 & <Lane>')
+        with zipfile.ZipFile(io.BytesIO(self.export('xlsx'))) as zf:
+            self.assertIsNone(zf.testzip())
+            sheet = zf.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 4)
+        self.assertIn('Road1 &amp; &lt;Lane&gt;', sheet)
+
@@ -1,7 +1,12 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
+from django.db import transaction
+import copy
+import math
 from core.models import Order, OrderItem
+from core.jobs import enqueue
+from core import rollups
 
 # Check superuser
 def superuser_required(view_func):
@@ -15,50 +20,83 @@ def superuser_required(view_func):
 
 from django.shortcuts import render
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Q, Sum
+from django.core.cache import cache
+from django.db.models import Count, Sum, prefetch_related_objects
+import hashlib
+
+from django.http import StreamingHttpResponse
+
+from core.pagination import keyset_paginate, cursor_url
+from .exports import STREAMERS, EXPORT_FORMATS, export_filename
+from .order_filters import (
+    ORDER_SORTS, DEFAULT_ORDER_SORT, ORDER_PAGE_SIZE, parse_order_filters, filter_orders,
+)
+
+
+ORDER_TOTALS_TIMEOUT = 60 * 5
+
+
+def _order_totals(filters):
+    """
+    Count and revenue for the filtered set. Status and date filters map onto
+    the sales rollups; only a text search needs the (briefly cached) scan.
+    """
+    if not filters['search']:
+        return rollups.totals(filters['status'], filters['date_from'], filters['date_to'])
+
+    key = 'admin_panel:order_totals:' + hashlib.md5(
+        repr(sorted(filters.items())).encode()
+    ).hexdigest()
+    totals = cache.get(key)
+    if totals is None:
+        totals = filter_orders(filters).aggregate(count=Count('id'), revenue=Sum('total'))
+        cache.set(key, totals, ORDER_TOTALS_TIMEOUT)
+    return totals
 
 
 @superuser_required
 def admin_order_list(request):
-    # Start with all orders
-    orders = Order.objects.select_related('user').prefetch_related('items').all()
-    
-    # Search filter
-    search_query = request.GET.get('search', '').strip()
-    if search_query:
-        orders = orders.filter(
-            Q(id__icontains=search_query) |
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(mobile__icontains=search_query) |
-            Q(user__username__icontains=search_query)
-        )
-    
-    # Status filter
-    status_filter = request.GET.get('status', '').strip()
-    if status_filter:
-        orders = orders.filter(payment_status=status_filter)
-    
-    # Sorting
-    sort_by = request.GET.get('sort', '-created_at')
-    valid_sorts = ['-created_at', 'created_at', '-total', 'total', '-id', 'id']
-    if sort_by in valid_sorts:
-        orders = orders.order_by(sort_by)
-    else:
-        orders = orders.order_by('-created_at')
-    
-    # Calculate total revenue
-    total_revenue = orders.aggregate(Sum('total'))['total__sum'] or 0
-    
+    filters = parse_order_filters(request.GET)
+
+    # One keyset page (no OFFSET, no full load); items only for that page
+    page = keyset_paginate(
+        filter_orders(filters),
+        sort=request.GET.get('sort'),
+        cursor=request.GET.get('cursor'),
+        page_size=ORDER_PAGE_SIZE,
+        sorts=ORDER_SORTS,
+        default_sort=DEFAULT_ORDER_SORT,
+    )
+    prefetch_related_objects(page['items'], 'items')
+    page['next_url'] = cursor_url(request, page['next_cursor']) if page['next_cursor'] else None
+    page['prev_url'] = cursor_url(request, page['prev_cursor']) if page['prev_cursor'] else None
+
+    totals = _order_totals(filters)
+
     context = {
-        'orders': orders,
-        'total_revenue': total_revenue,
+        'orders': page['items'],
+        'page': page,
+        'filters': filters,
+        'order_count': totals['count'],
+        'total_revenue': totals['revenue'] or 0,
     }
     
     return render(request, 'order/admin_order_list.html', context) 
 
 
+@superuser_required
+def admin_order_export(request):
+    """Stream the filtered orders (same filters as the list) as CSV, XLSX or JSONL."""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in STREAMERS:
+        fmt = 'csv'
+    filters = parse_order_filters(request.GET)
+
+    response = StreamingHttpResponse(STREAMERS[fmt](filters), content_type=EXPORT_FORMATS[fmt][0])
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(fmt)}"'
+    return response
+
+
 # 2. Superuser: Order detail / Voucher
 @superuser_required
 def admin_order_detail(request, pk):
@@ -72,14 +110,32 @@ def admin_update_payment(request, pk):
     order = get_object_or_404(Order, pk=pk)
 
     if request.method == "POST":
-        amount_paid = float(request.POST.get("amount_paid", 0))
+        try:
+            amount_paid = float(request.POST.get("amount_paid", 0))
+        except (TypeError, ValueError):
+            amount_paid = None
         status = request.POST.get("payment_status")
         transaction_id = request.POST.get("payment_transaction_id", "")
 
-        order.amount_paid = amount_paid
-        order.payment_status = status
-        order.payment_transaction_id = transaction_id
-        order.save()
+        error = None
+        if amount_paid is None or not math.isfinite(amount_paid) or amount_paid < 0:
+            error = "Amount paid must be a number, 0 or more."
+        elif status not in dict(Order._meta.get_field("payment_status").choices):
+            error = "Choose a valid payment status."
+        if error:
+            return render(request, "order/admin_update_payment.html", {"order": order, "error": error}, status=400)
+
+        with transaction.atomic():
+            # re-read under a row lock so the rollup moves from what is
+            # actually stored, not from a copy another admin has since changed
+            order = Order.objects.select_for_update().get(pk=pk)
+            before = copy.copy(order)
+            order.amount_paid = amount_paid
+            order.payment_status = status
+            order.payment_transaction_id = transaction_id
+            order.save()
+            rollups.move_order(before, order)
+            enqueue("orders.payment_updated", {"order_id": order.id})
 
         messages.success(request, "Payment info updated successfully!")
         return redirect("admin_order_detail", pk=order.id)
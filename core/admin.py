@@ -171,3 +171,70 @@ class OrderItemAdmin(admin.ModelAdmin):
         return obj.price * obj.qty
 
     total_amount.short_description = "Total"
+
+
+from .models import Cart, CartItem
+
+
+class CartItemInline(admin.TabularInline):
+    model = CartItem
+    extra = 0
+    raw_id_fields = ("product",)
+
+
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "created_at", "updated_at")
+    list_select_related = ("user",)
+    date_hierarchy = "updated_at"
+    inlines = [CartItemInline]
+
+
+from .models import StockReservation
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ("product", "cart", "qty", "expires_at")
+    list_select_related = ("product",)
+    raw_id_fields = ("product", "cart")
+
+
+from .models import InventoryMovement
+
+
+@admin.register(InventoryMovement)
+class InventoryMovementAdmin(admin.ModelAdmin):
+    list_display = ("id", "product", "kind", "qty", "order", "created_at")
+    list_filter = ("kind",)
+    list_select_related = ("product",)
+    raw_id_fields = ("product", "order")
+    date_hierarchy = "created_at"
+
+    # append-only: corrections are new movements, not edits
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "queue", "status", "attempts", "run_at", "finished_at")
+    list_filter = ("status", "queue", "name")
+    search_fields = ("name", "unique_key")
+    readonly_fields = ("last_error", "locked_by", "locked_at", "created_at", "finished_at")
+    actions = ["retry_jobs"]
+
+    @admin.action(description="Retry selected jobs now")
+    def retry_jobs(self, request, queryset):
+        from django.utils import timezone
+
+        updated = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now(), last_error="",
+        )
+        self.message_user(request, f"{updated} jobs requeued.")
@@ -0,0 +1,47 @@
+import string
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Brand
+
+BRAND_DIRECTORY_CACHE_KEY = 'core:brand_directory'
+LETTERS = list(string.ascii_uppercase)
+# invalidation only reaches this process's cache; other workers catch up on expiry
+BRAND_DIRECTORY_TIMEOUT = 60 * 5
+
+
+def build_brand_directory():
+    """
+    All brands with their active product counts from ONE grouped query,
+    bucketed into "0-9" and A-Z in Python.
+    """
+    rows = (
+        Brand.objects
+        .annotate(product_count=Count('brand', filter=Q(brand__is_active=True)))
+        .values('id', 'name', 'product_count')
+        .order_by('name')
+    )
+
+    digits = []
+    by_letter = {letter: [] for letter in LETTERS}
+    for row in rows:
+        first = row['name'][:1].upper()
+        if first.isdigit():
+            digits.append(row)
+        elif first in by_letter:
+            by_letter[first].append(row)
+
+    return {'digits': digits, 'brands_by_letter': by_letter}
+
+
+def get_brand_directory():
+    directory = cache.get(BRAND_DIRECTORY_CACHE_KEY)
+    if directory is None:
+        directory = build_brand_directory()
+        cache.set(BRAND_DIRECTORY_CACHE_KEY, directory, BRAND_DIRECTORY_TIMEOUT)
+    return directory
+
+
+def invalidate_brand_directory():
+    cache.delete(BRAND_DIRECTORY_CACHE_KEY)
@@ -0,0 +1,333 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+from .models import Cart, CartItem, Product
+from .pricing import price_cart
+
+CART_SESSION_KEY = 'cart_id'
+SUMMARY_CACHE_KEY = 'core:cart_summary:{}'
+# Every change rewrites the entry, but only in the worker that made it; with a
+# per-process cache the others serve their copy until it expires.
+SUMMARY_TIMEOUT = 30
+
+
+# ---------------- Summary (header counter) ----------------
+
+def _summary_dict(total_qty, total_amount):
+    return {'qty': total_qty, 'total': float(total_amount)}
+
+
+def _apply_delta(cart_id, qty_delta, amount_delta):
+    """
+    Move the running totals on Cart with F() and refresh the cached summary.
+    Returns the new summary.
+    """
+    Cart.objects.filter(pk=cart_id).update(
+        total_qty=F('total_qty') + qty_delta,
+        total_amount=F('total_amount') + amount_delta,
+        version=F('version') + 1,
+        updated_at=timezone.now(),
+    )
+    return _store_summary(cart_id)
+
+
+def _store_summary(cart_id):
+    row = Cart.objects.filter(pk=cart_id).values('total_qty', 'total_amount').first()
+    summary = _summary_dict(row['total_qty'], row['total_amount']) if row else _summary_dict(0, 0)
+    cache.set(SUMMARY_CACHE_KEY.format(cart_id), summary, SUMMARY_TIMEOUT)
+    return summary
+
+
+def recalculate_totals(cart_id):
+    """Exact totals from the lines at current prices (one aggregate query)."""
+    line_total = ExpressionWrapper(
+        F('qty') * F('product__effective_price'),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    totals = CartItem.objects.filter(cart_id=cart_id).aggregate(
+        total_qty=Sum('qty'), amount=Sum(line_total)
+    )
+    Cart.objects.filter(pk=cart_id).update(
+        total_qty=totals['total_qty'] or 0,
+        total_amount=totals['amount'] or 0,
+        version=F('version') + 1,
+        updated_at=timezone.now(),
+    )
+    return _store_summary(cart_id)
+
+
+def get_summary(request):
+    """{'qty', 'total'} for the header badge, from cache when possible."""
+    cart_id = request.session.get(CART_SESSION_KEY)
+    if not cart_id:
+        return _summary_dict(0, 0)
+    summary = cache.get(SUMMARY_CACHE_KEY.format(cart_id))
+    if summary is None:
+        summary = _store_summary(cart_id)
+    return summary
+
+
+def _line(cart, product):
+    qty = CartItem.objects.filter(cart=cart, product=product).values_list('qty', flat=True).first()
+    if qty is None:
+        return {'product_id': product.id, 'name': product.name, 'qty': 0, 'removed': True}
+    price = float(product.effective_price)
+    return {
+        'product_id': product.id,
+        'name': product.name,
+        'qty': qty,
+        'price': price,
+        'line_total': price * qty,
+    }
+
+
+# ---------------- Cart lookup ----------------
+
+def get_cart(request, create=False):
+    """
+    The request's cart, or None. Only the id lives in the session; a logged-in
+    user on a new device falls back to their most recent cart.
+    """
+    cart_id = request.session.get(CART_SESSION_KEY)
+    cart = None
+    if cart_id:
+        cart = Cart.objects.filter(pk=cart_id).first()
+
+    if cart is None and request.user.is_authenticated:
+        cart = Cart.objects.filter(user=request.user).order_by('-updated_at').first()
+
+    if cart is None and create:
+        cart = Cart.objects.create(
+            user=request.user if request.user.is_authenticated else None
+        )
+
+    if cart is not None and cart_id != cart.pk:
+        request.session[CART_SESSION_KEY] = cart.pk
+    return cart
+
+
+# ---------------- Line updates ----------------
+
+def line_qty(cart, product_ids):
+    """{product_id: qty currently in the cart} for the given products."""
+    return dict(
+        cart.items.filter(product_id__in=list(product_ids)).values_list('product_id', 'qty')
+    )
+
+
+def add_item(cart, product, qty=1):
+    """
+    Upsert one line: UPDATE qty = qty + n, INSERT only if the line is new.
+    Returns (changed line, cart summary).
+    """
+    price = product.effective_price
+    line = CartItem.objects.filter(cart=cart, product=product)
+    updated = line.update(qty=F('qty') + qty, unit_price=price)
+    if not updated:
+        try:
+            with transaction.atomic():
+                CartItem.objects.create(cart=cart, product=product, qty=qty, unit_price=price)
+        except IntegrityError:
+            # concurrent first add of the same product
+            line.update(qty=F('qty') + qty, unit_price=price)
+    summary = _apply_delta(cart.pk, qty, product.effective_price * qty)
+    return _line(cart, product), summary
+
+
+def add_items(cart, quantities):
+    """
+    Batch add {product_id: qty} (e.g. a bundle): one query for the products,
+    one for existing lines, one bulk_update + one bulk_create.
+    Returns (changed lines, cart summary).
+    """
+    products = Product.objects.filter(pk__in=quantities, is_active=True).in_bulk()
+    if not products:
+        return [], _store_summary(cart.pk)
+
+    with transaction.atomic():
+        existing = {i.product_id: i for i in cart.items.filter(product_id__in=products)}
+        to_update, to_create = [], []
+        qty_delta = 0
+        amount_delta = Decimal('0')
+        for pk, product in products.items():
+            qty = quantities[pk]
+            qty_delta += qty
+            amount_delta += product.effective_price * qty
+            if pk in existing:
+                existing[pk].qty += qty
+                existing[pk].unit_price = product.effective_price
+                to_update.append(existing[pk])
+            else:
+                to_create.append(CartItem(
+                    cart=cart, product=product, qty=qty, unit_price=product.effective_price
+                ))
+        CartItem.objects.bulk_update(to_update, ['qty', 'unit_price'])
+        CartItem.objects.bulk_create(to_create)
+
+    summary = _apply_delta(cart.pk, qty_delta, amount_delta)
+    new_qty = {i.product_id: i.qty for i in to_update + to_create}
+    lines = [
+        {
+            'product_id': pk,
+            'name': product.name,
+            'qty': new_qty[pk],
+            'price': float(product.effective_price),
+            'line_total': float(product.effective_price) * new_qty[pk],
+        }
+        for pk, product in products.items()
+    ]
+    return lines, summary
+
+
+def change_qty(cart, product_id, delta):
+    """
+    +1 / -1 from the cart page. Dropping to zero removes the line.
+    Returns (changed line, cart summary), line is None if it wasn't in the cart.
+    """
+    item = CartItem.objects.filter(cart=cart, product_id=product_id).select_related('product').first()
+    if item is None:
+        return None, get_summary_for_cart(cart)
+
+    if delta < 0 and item.qty <= -delta:
+        applied = -item.qty
+        item.delete()
+    else:
+        applied = delta
+        CartItem.objects.filter(pk=item.pk).update(qty=F('qty') + delta)
+
+    summary = _apply_delta(cart.pk, applied, item.product.effective_price * applied)
+    return _line(cart, item.product), summary
+
+
+def remove_item(cart, product_id):
+    item = CartItem.objects.filter(cart=cart, product_id=product_id).select_related('product').first()
+    if item is None:
+        return get_summary_for_cart(cart)
+    item.delete()
+    return _apply_delta(cart.pk, -item.qty, -item.product.effective_price * item.qty)
+
+
+def get_summary_for_cart(cart):
+    summary = cache.get(SUMMARY_CACHE_KEY.format(cart.pk))
+    return summary if summary is not None else _store_summary(cart.pk)
+
+
+def clear_ordered_items(request, ordered):
+    """
+    After an order: take the ordered quantities ({product_id: qty}) out of the
+    (possibly just merged) cart, and drop the cart itself once it is empty.
+    Lines added or topped up in another tab keep whatever wasn't ordered.
+    """
+    cart = get_cart(request)
+    if cart is None:
+        return
+    with transaction.atomic():
+        for product_id, qty in ordered.items():
+            lines = cart.items.filter(product_id=product_id)
+            lines.filter(qty__lte=qty).delete()
+            lines.update(qty=F('qty') - qty)
+    if not cart.items.exists():
+        cache.delete(SUMMARY_CACHE_KEY.format(cart.pk))
+        cart.delete()
+        request.session.pop(CART_SESSION_KEY, None)
+    else:
+        recalculate_totals(cart.pk)
+
+
+# ---------------- Full cart ----------------
+
+def cart_lines(cart):
+    """
+    Lines in the shape the templates always used for the session cart:
+    {"<product_id>": {"name", "price", "qty", "image", ...}}, re-priced live
+    by core.pricing.price_cart.
+    """
+    return price_cart(cart)['lines']
+
+
+def acknowledge_prices(cart, pricing):
+    """
+    The customer has now seen these prices (cart page): store them on the
+    lines and write back exact running totals. No writes when nothing moved.
+    """
+    if cart is None:
+        return
+    stale = {
+        int(pid): line['unit_price']
+        for pid, line in pricing['lines'].items()
+        if line['previous_price'] is None or line['changed']
+    }
+    if stale:
+        items = list(cart.items.filter(product_id__in=stale))
+        for item in items:
+            item.unit_price = stale[item.product_id]
+        CartItem.objects.bulk_update(items, ['unit_price'])
+
+    total = Decimal(str(round(pricing['subtotal'], 2)))
+    if stale or cart.total_qty != pricing['qty'] or cart.total_amount != total:
+        Cart.objects.filter(pk=cart.pk).update(
+            total_qty=pricing['qty'], total_amount=total, version=F('version') + 1,
+        )
+        _store_summary(cart.pk)
+
+
+# ---------------- Login merge / expiry ----------------
+
+def merge_carts(request, user):
+    """
+    On login: fold the guest cart into the user's cart (quantities add up),
+    using bulk writes, and point the session at the surviving cart.
+    """
+    guest_id = request.session.get(CART_SESSION_KEY)
+    guest = Cart.objects.filter(pk=guest_id).first() if guest_id else None
+    user_cart = Cart.objects.filter(user=user).order_by('-updated_at').first()
+
+    if guest is None or guest.user_id == user.pk:
+        if user_cart:
+            request.session[CART_SESSION_KEY] = user_cart.pk
+        return
+    if guest.user_id is not None:
+        # someone else's cart id in this session; don't touch it
+        request.session.pop(CART_SESSION_KEY, None)
+        return
+
+    if user_cart is None:
+        guest.user = user
+        guest.save(update_fields=['user', 'updated_at'])
+        request.session[CART_SESSION_KEY] = guest.pk
+        return
+
+    with transaction.atomic():
+        existing = {i.product_id: i for i in user_cart.items.all()}
+        to_update, to_create = [], []
+        for item in guest.items.all():
+            if item.product_id in existing:
+                line = existing[item.product_id]
+                line.qty += item.qty
+                to_update.append(line)
+            else:
+                to_create.append(CartItem(
+                    cart=user_cart, product_id=item.product_id, qty=item.qty, unit_price=item.unit_price
+                ))
+        CartItem.objects.bulk_update(to_update, ['qty'])
+        CartItem.objects.bulk_create(to_create)
+        cache.delete(SUMMARY_CACHE_KEY.format(guest.pk))
+        guest.delete()
+    recalculate_totals(user_cart.pk)
+    request.session[CART_SESSION_KEY] = user_cart.pk
+
+
+def expire_carts(days=None):
+    """Bulk delete carts untouched for CART_EXPIRY_DAYS. Returns number deleted."""
+    days = days if days is not None else getattr(settings, 'CART_EXPIRY_DAYS', 30)
+    cutoff = timezone.now() - timedelta(days=days)
+    stale = Cart.objects.filter(updated_at__lt=cutoff)
+    CartItem.objects.filter(cart__in=stale).delete()
+    deleted, _ = stale.delete()
+    return deleted
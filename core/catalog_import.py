@@ -0,0 +1,372 @@
+"""
+Bulk catalog import behind `manage.py import_catalog`.
+
+Rows are read from CSV or JSONL and written in batches. Each batch is one
+bulk_create of products, images and opening-stock movements. Category paths
+("Electronics > Phones > Android") resolve through an in-memory tree.
+Brands are created in bulk. Slugs are allocated for a whole batch from two
+queries instead of one existence check per row. Image files are copied on a
+thread pool outside the transaction, and their WebP variants are rendered
+on the core.images process pool.
+
+bulk_create skips model signals, so the importer does their work itself:
+search indexing, cover images, the stock ledger and cache invalidation.
+
+Re-running or resuming a file never duplicates products: rows matching an
+existing slug, or (without a slug) an existing name + brand, are skipped.
+"""
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from . import search
+from .brand_directory import invalidate_brand_directory
+from .context_processors import invalidate_menu_cache
+from .dashboard import invalidate_dashboard_kpis
+from .images import get_executor, pending_jobs, render_variants
+from .inventory import record_movements
+from .models import Brand, Category, InventoryMovement, Product, ProductImage
+
+IMPORT_BATCH_SIZE = 500
+IMAGE_WORKERS = 8
+CATEGORY_SEPARATOR = '>'
+IMAGE_SEPARATOR = '|'
+# leaves room for a "-<n>" suffix inside Product.slug's max_length
+SLUG_BASE_LENGTH = 240
+SLUG_QUERY_CHUNK = 100
+
+PRODUCT_STATUSES = {value for value, _ in Product.STATUS_CHOICES}
+
+
+class RowError(ValueError):
+    pass
+
+
+# ---------------- Reading ----------------
+
+def detect_format(path):
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(path, fmt=None):
+    """
+    Yields (row number, raw row), counting data rows from 1. A raw row is a
+    dict for CSV and the undecoded line for JSONL, so bad JSON is reported
+    per row instead of aborting the run.
+    """
+    fmt = fmt or detect_format(path)
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if fmt == 'jsonl':
+            rows = (line for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        yield from enumerate(rows, 1)
+
+
+def _text(raw, key):
+    value = raw.get(key)
+    return '' if value is None else str(value).strip()
+
+
+def _decimal(raw, key, required=False):
+    value = _text(raw, key)
+    if not value:
+        if required:
+            raise RowError(f"{key} is required")
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise RowError(f"{key} is not a number: {value!r}")
+    if not number.is_finite():
+        raise RowError(f"{key} is not a number: {value!r}")
+    if number < 0:
+        raise RowError(f"{key} can't be negative")
+    return number.quantize(Decimal('0.01'))
+
+
+def _int(raw, key, default=0):
+    value = _text(raw, key)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise RowError(f"{key} is not a whole number: {value!r}")
+    if number < 0:
+        raise RowError(f"{key} can't be negative")
+    return number
+
+
+def _bool(raw, key, default):
+    value = _text(raw, key).lower()
+    if not value:
+        return default
+    return value in ('1', 'true', 'yes', 'y')
+
+
+def parse_row(raw):
+    """Validate one raw row into the importer's shape; raises RowError."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError as exc:
+            raise RowError(f"invalid JSON: {exc}")
+        if not isinstance(raw, dict):
+            raise RowError("expected a JSON object")
+
+    name = _text(raw, 'name')
+    if not name:
+        raise RowError("name is required")
+    category = tuple(p.strip() for p in _text(raw, 'category').split(CATEGORY_SEPARATOR) if p.strip())
+    if not category:
+        raise RowError("category is required")
+
+    status = _text(raw, 'status') or 'regular'
+    if status not in PRODUCT_STATUSES:
+        raise RowError(f"unknown status {status!r}")
+
+    images = raw.get('images') or []
+    if isinstance(images, str):
+        images = images.split(IMAGE_SEPARATOR)
+    images = [str(i).strip() for i in images if str(i).strip()]
+
+    return {
+        'name': name[:255],
+        'slug': slugify(_text(raw, 'slug'))[:255],
+        'category': category,
+        'brand': _text(raw, 'brand')[:100],
+        'images': images,
+        'fields': {
+            'price': _decimal(raw, 'price', required=True),
+            'old_price': _decimal(raw, 'old_price'),
+            'discount_percent': _int(raw, 'discount_percent'),
+            'stock_quantity': _int(raw, 'stock_quantity'),
+            'status': status,
+            'is_active': _bool(raw, 'is_active', True),
+            'is_featured': _bool(raw, 'is_featured', False),
+            'short_description': _text(raw, 'short_description') or None,
+            'description': _text(raw, 'description') or None,
+        },
+    }
+
+
+# ---------------- Resume state ----------------
+
+def load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'done': 0, 'complete': False}
+
+
+def save_state(path, done, complete=False):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'done': done, 'complete': complete}, f)
+    os.replace(tmp, path)
+
+
+# ---------------- Importer ----------------
+
+class CatalogImporter:
+    """
+    Keeps the category tree and brand names in memory for the whole run.
+    Feed it parsed rows with import_batch(); call finish() once at the end.
+    """
+
+    def __init__(self, images_dir, image_workers=IMAGE_WORKERS):
+        self.images_dir = images_dir
+        self.image_workers = image_workers
+        self.categories = {
+            (c.parent_id, c.name.lower()): c
+            for c in Category.objects.only('id', 'name', 'parent_id', 'path', 'depth')
+        }
+        self.brands = {name.lower(): pk for pk, name in Brand.objects.values_list('id', 'name')}
+        self.variant_futures = []
+        self.stats = {
+            'products': 0, 'existing': 0, 'categories': 0, 'brands': 0,
+            'images': 0, 'missing_images': 0,
+        }
+
+    def category_for(self, path):
+        parent = None
+        for name in path:
+            key = (parent.pk if parent else None, name.lower())
+            category = self.categories.get(key)
+            if category is None:
+                # save() maintains path / depth; new categories are few per import
+                category = Category(name=name[:100], parent=parent)
+                category.save()
+                self.categories[key] = category
+                self.stats['categories'] += 1
+            parent = category
+        return parent
+
+    def resolve_brands(self, names):
+        missing = {}
+        for name in names:
+            if name and name.lower() not in self.brands:
+                missing.setdefault(name.lower(), name)
+        if not missing:
+            return
+        Brand.objects.bulk_create([Brand(name=n) for n in missing.values()], ignore_conflicts=True)
+        for pk, name in Brand.objects.filter(name__in=missing.values()).values_list('id', 'name'):
+            self.brands[name.lower()] = pk
+        self.stats['brands'] += len(missing)
+
+    def allocate_slugs(self, rows):
+        """Fill row['slug'] for rows without one: base slug, then base-1, base-2, ..."""
+        bases = {r['slug'] or (slugify(r['name']) or 'product')[:SLUG_BASE_LENGTH] for r in rows}
+        taken = set(Product.objects.filter(slug__in=bases).values_list('slug', flat=True))
+        clashing = sorted(b for b in bases if b in taken)
+        for i in range(0, len(clashing), SLUG_QUERY_CHUNK):
+            q = Q()
+            for base in clashing[i:i + SLUG_QUERY_CHUNK]:
+                q |= Q(slug__startswith=f'{base}-')
+            taken.update(Product.objects.filter(q).values_list('slug', flat=True))
+        taken.update(r['slug'] for r in rows if r['slug'])
+
+        for row in rows:
+            if row['slug']:
+                continue
+            base = (slugify(row['name']) or 'product')[:SLUG_BASE_LENGTH]
+            slug, counter = base, 1
+            while slug in taken:
+                slug = f'{base}-{counter}'
+                counter += 1
+            taken.add(slug)
+            row['slug'] = slug
+
+    def _store_image(self, name):
+        src = name if os.path.isabs(name) else os.path.join(self.images_dir, name)
+        if not os.path.isfile(src):
+            return None
+        with open(src, 'rb') as fh:
+            return default_storage.save(f'products/{os.path.basename(src)}', File(fh))
+
+    def store_images(self, rows):
+        """Copy every row's images into media storage on a thread pool: {row index: [names]}."""
+        work = [(i, name) for i, row in enumerate(rows) for name in row['images']]
+        stored = {}
+        if not work:
+            return stored
+        with ThreadPoolExecutor(max_workers=self.image_workers) as pool:
+            for (i, _), saved in zip(work, pool.map(self._store_image, [name for _, name in work])):
+                if saved is None:
+                    self.stats['missing_images'] += 1
+                else:
+                    stored.setdefault(i, []).append(saved)
+        return stored
+
+    def existing_keys(self, rows):
+        """
+        Slugs, and (name, brand) for rows without a slug, that are already in
+        the catalog. The resume state is written after a batch commits, so a
+        crash in between replays that batch; these keys keep it from
+        duplicating products.
+        """
+        explicit = [r['slug'] for r in rows if r['slug']]
+        keys = set(Product.objects.filter(slug__in=explicit).values_list('slug', flat=True))
+        names = {r['name'] for r in rows if not r['slug']}
+        keys.update(
+            (name, (brand or '').lower())
+            for name, brand in Product.objects.filter(name__in=names).values_list('name', 'brand__name')
+        )
+        return keys
+
+    def import_batch(self, rows):
+        """Write one batch of parsed rows. Returns the number of products created."""
+        existing = self.existing_keys(rows)
+        new_rows, seen = [], set()
+        for row in rows:
+            # re-running a file must not duplicate products it already created
+            key = row['slug'] or (row['name'], row['brand'].lower())
+            if key in existing or key in seen:
+                self.stats['existing'] += 1
+                continue
+            seen.add(key)
+            new_rows.append(row)
+        if not new_rows:
+            return 0
+
+        self.resolve_brands(r['brand'] for r in new_rows)
+        self.allocate_slugs(new_rows)
+        stored = self.store_images(new_rows)
+
+        # categories created by a batch that rolls back must not stay memoized
+        categories, created_categories = dict(self.categories), self.stats['categories']
+        try:
+            products, images = self._write_batch(new_rows, stored)
+        except BaseException:
+            self.categories, self.stats['categories'] = categories, created_categories
+            raise
+
+        search.index_products([p.pk for p in products])
+        executor = get_executor()
+        for image in images:
+            work = pending_jobs(image.image)
+            if work:
+                self.variant_futures.append(executor.submit(render_variants, *work))
+
+        self.stats['products'] += len(products)
+        self.stats['images'] += len(images)
+        return len(products)
+
+    def _write_batch(self, rows, stored):
+        """The database half of import_batch, in one transaction: (products, images)."""
+        with transaction.atomic():
+            products = []
+            for row in rows:
+                product = Product(
+                    category=self.category_for(row['category']),
+                    brand_id=self.brands.get(row['brand'].lower()) if row['brand'] else None,
+                    name=row['name'],
+                    slug=row['slug'],
+                    **row['fields'],
+                )
+                product.effective_price = product.price_with_deal()
+                products.append(product)
+            Product.objects.bulk_create(products)
+
+            images = [
+                ProductImage(product=product, image=name, sort_order=n)
+                for i, product in enumerate(products)
+                for n, name in enumerate(stored.get(i, []))
+            ]
+            ProductImage.objects.bulk_create(images)
+
+            covers = {}
+            for image in images:
+                covers.setdefault(image.product_id, image)
+            for product in products:
+                product.cover_image = covers.get(product.pk)
+            Product.objects.bulk_update([p for p in products if p.cover_image], ['cover_image'])
+
+            record_movements([
+                InventoryMovement(product=p, kind=InventoryMovement.RESTOCK, qty=p.stock_quantity, note='import')
+                for p in products
+            ])
+        return products, images
+
+    def finish(self):
+        """Invalidate what the skipped signals would have. Returns failed variant renders."""
+        invalidate_menu_cache()
+        invalidate_brand_directory()
+        invalidate_dashboard_kpis()
+        failed = 0
+        for future in self.variant_futures:
+            try:
+                future.result()
+            except Exception:
+                failed += 1
+        return failed
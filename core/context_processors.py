@@ -1,5 +1,69 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
 from .models import Category
+from .cart import get_summary
+
+MENU_TREE_CACHE_KEY = 'core:menu_tree'
+MENU_HTML_CACHE_KEY = 'core:menu_html'
+MENU_TOP_LIMIT = 12
+# invalidation only reaches this process's cache; other workers catch up on expiry
+MENU_CACHE_TIMEOUT = 60 * 5
+
+
+def build_menu_tree():
+    """
+    Three level category tree (main -> sub -> sub-sub) from a single query.
+    Nodes are plain dicts so they can live in the cache.
+    """
+    rows = (
+        Category.objects.filter(depth__lte=2)
+        .order_by('depth', 'name')
+        .values('id', 'name', 'slug', 'parent_id')
+    )
+
+    nodes = {}
+    roots = []
+    for row in rows:
+        node = {'id': row['id'], 'name': row['name'], 'slug': row['slug'], 'children': []}
+        nodes[row['id']] = node
+        if row['parent_id'] is None:
+            roots.append(node)
+        elif row['parent_id'] in nodes:
+            nodes[row['parent_id']]['children'].append(node)
+    return roots
+
+
+def get_menu_tree():
+    tree = cache.get(MENU_TREE_CACHE_KEY)
+    if tree is None:
+        tree = build_menu_tree()
+        cache.set(MENU_TREE_CACHE_KEY, tree, MENU_CACHE_TIMEOUT)
+    return tree
+
+
+def get_menu_html():
+    html = cache.get(MENU_HTML_CACHE_KEY)
+    if html is None:
+        html = render_to_string('partials/category_menu.html', {
+            'menu_categories': get_menu_tree()[:MENU_TOP_LIMIT],
+        })
+        cache.set(MENU_HTML_CACHE_KEY, html, MENU_CACHE_TIMEOUT)
+    return html
+
+
+def invalidate_menu_cache():
+    cache.delete_many([MENU_TREE_CACHE_KEY, MENU_HTML_CACHE_KEY])
+
 
 def categories_menu(request):
-    categories = Category.objects.filter(parent__isnull=True).prefetch_related('children')
-    return {'menu_categories': categories}
+    # Both are evaluated lazily by the template, so pages that don't show
+    # the menu never touch the cache or the database.
+    return {
+        'menu_categories': get_menu_tree,
+        'menu_html': get_menu_html,
+    }
+
+
+def cart_summary(request):
+    # Lazy, and served from the cached summary that cart writes keep current
+    return {'cart_qty': lambda: get_summary(request)['qty']}
@@ -0,0 +1,65 @@
+"""
+Admin dashboard data. Catalog counters are cached and dropped by the
+Product / Category / Brand signals; today's orders and revenue come from
+SalesRollup; product tables are bounded index scans. Nothing here grows
+with the size of the catalog.
+"""
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import rollups
+from .inventory import LOW_STOCK_THRESHOLD
+from .models import Brand, Category, Product
+
+DASHBOARD_KPI_CACHE_KEY = 'core:dashboard_kpis'
+# bounds staleness of low_stock, which moves with plain UPDATEs (orders, ledger)
+DASHBOARD_KPI_TIMEOUT = 300
+DASHBOARD_TABLE_SIZE = 10
+
+TABLE_FIELDS = (
+    'id', 'name', 'price', 'old_price', 'stock_quantity', 'is_active', 'created_at',
+    'category__name', 'cover_image__image',
+)
+
+
+def build_catalog_kpis():
+    return {
+        'products': Product.objects.count(),
+        'active': Product.objects.filter(is_active=True).count(),
+        'out_of_stock': Product.objects.filter(stock_quantity=0).count(),
+        'categories': Category.objects.count(),
+        'brands': Brand.objects.count(),
+        'low_stock': low_stock_products().count(),
+    }
+
+
+def get_kpis():
+    kpis = cache.get(DASHBOARD_KPI_CACHE_KEY)
+    if kpis is None:
+        kpis = build_catalog_kpis()
+        cache.set(DASHBOARD_KPI_CACHE_KEY, kpis, DASHBOARD_KPI_TIMEOUT)
+
+    today = timezone.localdate()
+    sales = rollups.totals(date_from=today, date_to=today)
+    return {**kpis, 'orders_today': sales['count'], 'revenue_today': sales['revenue']}
+
+
+def invalidate_dashboard_kpis():
+    cache.delete(DASHBOARD_KPI_CACHE_KEY)
+
+
+def _table(qs):
+    return qs.select_related('category', 'cover_image').only(*TABLE_FIELDS)
+
+
+def recent_products(limit=DASHBOARD_TABLE_SIZE):
+    return _table(Product.objects.order_by('-created_at', '-id'))[:limit]
+
+
+def low_stock_products():
+    # served by core_prod_active_stock_idx
+    return Product.objects.filter(is_active=True, stock_quantity__lte=LOW_STOCK_THRESHOLD)
+
+
+def low_stock_table(limit=DASHBOARD_TABLE_SIZE):
+    return _table(low_stock_products().order_by('stock_quantity', 'id'))[:limit]
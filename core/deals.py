@@ -0,0 +1,95 @@
+import heapq
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import HotDeal, Product
+
+ACTIVE_DEALS_CACHE_KEY = 'core:active_deals'
+DEAL_SWEEP_CACHE_KEY = 'core:deal_prices_swept_at'
+REFRESH_CHUNK_SIZE = 1000
+
+# end_date is inclusive (end_date__gte=now), the deal drops out right after it
+END_EPSILON = timedelta(microseconds=1)
+
+
+def _load_schedule(now):
+    """
+    One query for every deal that is running or still upcoming, with product
+    and cover image preloaded. Returns (active_deals, boundaries) where boundaries
+    is a heap of (when, product_id) for every future start / end.
+    """
+    deals = list(
+        HotDeal.objects.filter(end_date__gte=now)
+        .select_related('product', 'product__cover_image')
+        .order_by('end_date')
+    )
+
+    active = []
+    boundaries = []
+    for deal in deals:
+        if deal.start_date <= now:
+            active.append(deal)
+        else:
+            boundaries.append((deal.start_date, deal.product_id))
+        boundaries.append((deal.end_date + END_EPSILON, deal.product_id))
+    heapq.heapify(boundaries)
+    return active, boundaries
+
+
+def get_active_deals(now=None):
+    """
+    Currently running HotDeals, served from cache until the next scheduled
+    start / end boundary. When a boundary is crossed the affected products get
+    their effective_price recomputed too. Boundaries crossed while nothing was
+    cached (restart, eviction) are caught by refresh_deal_prices.
+    """
+    now = now or timezone.now()
+    entry = cache.get(ACTIVE_DEALS_CACHE_KEY)
+    if entry is not None:
+        boundaries = entry['boundaries']
+        if not boundaries or now < boundaries[0][0]:
+            return entry['deals']
+
+        # Pop every boundary we've passed; those products changed price
+        crossed = set()
+        while boundaries and boundaries[0][0] <= now:
+            crossed.add(heapq.heappop(boundaries)[1])
+        if crossed:
+            Product.refresh_effective_prices(crossed, now=now)
+
+    deals, boundaries = _load_schedule(now)
+    # No cache timeout: validity is checked against the next boundary above,
+    # and letting the entry expire on its own would skip the price refresh.
+    cache.set(ACTIVE_DEALS_CACHE_KEY, {'deals': deals, 'boundaries': boundaries}, None)
+    return deals
+
+
+def invalidate_active_deals():
+    cache.delete(ACTIVE_DEALS_CACHE_KEY)
+
+
+def refresh_deal_prices(now=None):
+    """
+    Recompute effective_price for products whose deal started or ended since
+    the last sweep. With no record of one (first run, restart, eviction)
+    every product that has a deal is checked. Returns the number changed.
+    """
+    now = now or timezone.now()
+    since = cache.get(DEAL_SWEEP_CACHE_KEY)
+    deals = HotDeal.objects.all()
+    if since is not None:
+        deals = deals.filter(
+            Q(start_date__gt=since, start_date__lte=now)
+            # end_date is inclusive: a deal is over once now > end_date
+            | Q(end_date__gte=since, end_date__lt=now)
+        )
+    ids = list(deals.values_list('product_id', flat=True).distinct())
+
+    changed = 0
+    for i in range(0, len(ids), REFRESH_CHUNK_SIZE):
+        changed += Product.refresh_effective_prices(ids[i:i + REFRESH_CHUNK_SIZE], now=now)
+    cache.set(DEAL_SWEEP_CACHE_KEY, now, None)
+    return changed
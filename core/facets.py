@@ -0,0 +1,214 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import BooleanField, Case, Count, IntegerField, Max, Min, Q, Value, When
+from django.db.models.functions import Floor
+
+# Rating thresholds offered in the sidebar ("4★ & above", "3★ & above")
+RATING_THRESHOLDS = (4, 3)
+STATUS_VALUES = ('new', 'sale', 'regular')
+
+PRICE_FIELD = 'effective_price'
+# Price facet buckets: [0, 500), [500, 1000), ..., [50000, and up)
+PRICE_BUCKET_EDGES = (500, 1000, 5000, 10000, 50000)
+
+
+def _price_bucket_label(index):
+    if index == 0:
+        return f"Under ৳{PRICE_BUCKET_EDGES[0]:,}"
+    if index == len(PRICE_BUCKET_EDGES):
+        return f"৳{PRICE_BUCKET_EDGES[-1]:,} & above"
+    return f"৳{PRICE_BUCKET_EDGES[index - 1]:,} – ৳{PRICE_BUCKET_EDGES[index]:,}"
+
+
+def price_bucket_range(index):
+    """(low, high) bounds of a bucket; high is None for the last one."""
+    low = PRICE_BUCKET_EDGES[index - 1] if index else 0
+    high = PRICE_BUCKET_EDGES[index] if index < len(PRICE_BUCKET_EDGES) else None
+    return low, high
+
+
+def parse_product_filters(request):
+    """Read the sidebar filters from GET, dropping anything malformed."""
+    get = request.GET
+
+    brand_ids = [int(b) for b in get.getlist('brand') if b.isdigit()]
+
+    try:
+        rating = int(get.get('rating') or 0) or None
+    except ValueError:
+        rating = None
+
+    try:
+        max_price = Decimal(get.get('max_price')) if get.get('max_price') else None
+    except InvalidOperation:
+        max_price = None
+
+    price_range = get.get('price_range') or ''
+    price_range = int(price_range) if price_range.isdigit() else None
+    if price_range is not None and price_range > len(PRICE_BUCKET_EDGES):
+        price_range = None
+
+    return {
+        'status': [s for s in get.getlist('status') if s in STATUS_VALUES],
+        'brand': brand_ids,
+        'rating': rating,
+        'featured': bool(get.get('featured')),
+        'in_stock': bool(get.get('in_stock')),
+        'max_price': max_price,
+        'price_range': price_range,
+    }
+
+
+def apply_product_filters(products, filters):
+    if filters['max_price'] is not None:
+        products = products.filter(**{f'{PRICE_FIELD}__lte': filters['max_price']})
+    if filters['price_range'] is not None:
+        low, high = price_bucket_range(filters['price_range'])
+        products = products.filter(**{f'{PRICE_FIELD}__gte': low})
+        if high is not None:
+            products = products.filter(**{f'{PRICE_FIELD}__lt': high})
+    if filters['in_stock']:
+        products = products.filter(stock_quantity__gt=0)
+    if filters['status']:
+        products = products.filter(status__in=filters['status'])
+    if filters['brand']:
+        products = products.filter(brand_id__in=filters['brand'])
+    if filters['rating']:
+        products = products.filter(rating__gte=filters['rating'])
+    if filters['featured']:
+        products = products.filter(is_featured=True)
+    return products
+
+
+def _row_matches(row, filters, skip):
+    """Does a grouped row pass every active filter except the `skip` facet?"""
+    if skip != 'status' and filters['status'] and row['status'] not in filters['status']:
+        return False
+    if skip != 'brand' and filters['brand'] and row['brand_id'] not in filters['brand']:
+        return False
+    if skip != 'rating' and filters['rating'] and row['rating_bucket'] < filters['rating']:
+        return False
+    if skip != 'featured' and filters['featured'] and not row['is_featured']:
+        return False
+    if skip != 'in_stock' and filters['in_stock'] and not row['in_stock']:
+        return False
+    if skip != 'price' and filters['price_range'] is not None and row['price_bucket'] != filters['price_range']:
+        return False
+    return True
+
+
+def compute_facets(base_products, filters):
+    """
+    Facet counts, price bucket counts and price range for the sidebar, from
+    ONE grouped query.
+
+    `base_products` is the listing scope before any sidebar filter (category
+    subtree, brand, ...). Rows are grouped by every facet dimension, price
+    bucket included; the max_price filter is folded in as a conditional
+    count, so each facet can be counted
+    with the usual "ignore your own selection" semantics in Python over a few
+    dozen rows instead of one query per facet.
+    """
+    annotations = {
+        'n': Count('id'),
+        'price_max': Max(PRICE_FIELD),
+        'price_min': Min(PRICE_FIELD),
+    }
+    if filters['max_price'] is not None:
+        annotations['n_price'] = Count(
+            'id', filter=Q(**{f'{PRICE_FIELD}__lte': filters['max_price']})
+        )
+
+    rows = list(
+        base_products
+        .annotate(
+            rating_bucket=Floor('rating'),
+            price_bucket=Case(
+                *[
+                    When(**{f'{PRICE_FIELD}__lt': edge}, then=Value(i))
+                    for i, edge in enumerate(PRICE_BUCKET_EDGES)
+                ],
+                default=Value(len(PRICE_BUCKET_EDGES)),
+                output_field=IntegerField(),
+            ),
+            in_stock=Case(
+                When(stock_quantity__gt=0, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        )
+        .values('brand_id', 'brand__name', 'status', 'rating_bucket', 'price_bucket', 'in_stock', 'is_featured')
+        .annotate(**annotations)
+        .order_by()
+    )
+
+    price_active = filters['max_price'] is not None
+
+    def count(row, skip):
+        if price_active and skip != 'price':
+            return row['n_price']
+        return row['n']
+
+    status_counts = {s: 0 for s in STATUS_VALUES}
+    brand_counts = {}
+    rating_counts = {str(t): 0 for t in RATING_THRESHOLDS}
+    price_counts = [0] * (len(PRICE_BUCKET_EDGES) + 1)
+    in_stock_count = 0
+    featured_count = 0
+    total = 0
+    price_max = None
+    price_min = None
+
+    for row in rows:
+        row['rating_bucket'] = int(row['rating_bucket'] or 0)
+
+        if _row_matches(row, filters, 'status'):
+            status_counts[row['status']] = status_counts.get(row['status'], 0) + count(row, 'status')
+
+        if row['brand_id'] is not None and _row_matches(row, filters, 'brand'):
+            entry = brand_counts.setdefault(
+                row['brand_id'], {'id': row['brand_id'], 'name': row['brand__name'], 'count': 0}
+            )
+            entry['count'] += count(row, 'brand')
+
+        if _row_matches(row, filters, 'rating'):
+            for t in RATING_THRESHOLDS:
+                if row['rating_bucket'] >= t:
+                    rating_counts[str(t)] += count(row, 'rating')
+
+        if row['in_stock'] and _row_matches(row, filters, 'in_stock'):
+            in_stock_count += count(row, 'in_stock')
+
+        if row['is_featured'] and _row_matches(row, filters, 'featured'):
+            featured_count += count(row, 'featured')
+
+        if _row_matches(row, filters, 'price'):
+            price_counts[row['price_bucket']] += count(row, 'price')
+            # price range ignores the price filters themselves
+            if price_max is None or row['price_max'] > price_max:
+                price_max = row['price_max']
+            if price_min is None or row['price_min'] < price_min:
+                price_min = row['price_min']
+
+        if _row_matches(row, filters, None):
+            total += count(row, None)
+
+    return {
+        'total': total,
+        'status': status_counts,
+        'brands': sorted(brand_counts.values(), key=lambda b: b['name'].lower()),
+        'rating': rating_counts,
+        'in_stock': in_stock_count,
+        'featured': featured_count,
+        'price_buckets': [
+            {
+                'index': i,
+                'label': _price_bucket_label(i),
+                'count': n,
+                'selected': filters['price_range'] == i,
+            }
+            for i, n in enumerate(price_counts)
+        ],
+        'price_min': price_min or 0,
+        'price_max': price_max or 0,
+    }
@@ -0,0 +1,108 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+
+# name -> bounding box. Images are shrunk to fit, never upscaled.
+VARIANTS = {
+    'thumb': (150, 150),
+    'card': (400, 400),
+    'zoom': (1200, 1200),
+}
+WEBP_QUALITY = 80
+
+_executor = None
+
+
+def get_executor():
+    """Process pool shared by upload signals and the backfill command."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2)
+        )
+    return _executor
+
+
+def variant_name(name, size):
+    # keep the original extension in the name so a.jpg / a.png don't collide
+    return f'variants/{size}/{name}.webp'
+
+
+def variant_path(name, size):
+    return os.path.join(settings.MEDIA_ROOT, variant_name(name, size))
+
+
+def variant_url(name, size):
+    """
+    The variant's media URL once it's on disk (served like any other upload);
+    until then the image_variant view, which renders it on first hit.
+    """
+    vname = variant_name(name, size)
+    if os.path.exists(variant_path(name, size)):
+        return default_storage.url(vname)
+    return reverse('image_variant', args=[size, name])
+
+
+def render_variants(src_path, jobs):
+    """
+    Runs in a worker process: open the source once, write every requested
+    (dest_path, box) as WebP. Returns the number of files written.
+    """
+    from PIL import Image
+
+    written = 0
+    with Image.open(src_path) as original:
+        original.load()
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA' if 'A' in original.getbands() else 'RGB')
+        for dest_path, box in jobs:
+            img = original.copy()
+            img.thumbnail(box)
+            dest_dir = os.path.dirname(dest_path)
+            os.makedirs(dest_dir, exist_ok=True)
+            # a private temp name per render: two workers may render the same variant
+            fd, tmp_path = tempfile.mkstemp(dir=dest_dir, suffix='.webp')
+            try:
+                with os.fdopen(fd, 'wb') as fh:
+                    img.save(fh, 'WEBP', quality=WEBP_QUALITY, method=4)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, dest_path)
+            except BaseException as exc:
+                # never leave a half-written variant behind
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                if isinstance(exc, OSError) and os.path.exists(dest_path):
+                    # lost the race to another worker; its file is just as good
+                    continue
+                raise
+            written += 1
+    return written
+
+
+def pending_jobs(fieldfile, force=False):
+    """(src_path, jobs) for variants of `fieldfile` not on disk yet, or None."""
+    if not fieldfile or not fieldfile.name:
+        return None
+    src_path = fieldfile.path
+    if not os.path.exists(src_path):
+        return None
+    src_mtime = os.path.getmtime(src_path)
+
+    jobs = []
+    for size, box in VARIANTS.items():
+        dest = variant_path(fieldfile.name, size)
+        if force or not os.path.exists(dest) or os.path.getmtime(dest) < src_mtime:
+            jobs.append((dest, box))
+    return (src_path, jobs) if jobs else None
+
+
+def schedule_variants(fieldfile):
+    """Queue missing variants on the process pool once the upload is committed."""
+    work = pending_jobs(fieldfile)
+    if work:
+        transaction.on_commit(lambda: get_executor().submit(render_variants, *work))
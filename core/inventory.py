@@ -0,0 +1,285 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max, Q, Sum
+from django.utils import timezone
+
+from .models import InventoryMovement, InventorySnapshot, Product, StockReservation
+
+AVAILABLE_CACHE_KEY = 'core:available:{}'
+AVAILABLE_TIMEOUT = 60
+# listings show "only N left" at or below this
+LOW_STOCK_THRESHOLD = 5
+
+
+def reservation_ttl():
+    return timedelta(minutes=getattr(settings, 'RESERVATION_TTL_MINUTES', 15))
+
+
+# ---------------- Available stock ----------------
+
+def _held(product_ids, now, exclude_cart=None):
+    qs = StockReservation.objects.filter(product_id__in=product_ids, expires_at__gt=now)
+    if exclude_cart is not None:
+        qs = qs.exclude(cart=exclude_cart)
+    return dict(
+        qs.values('product_id').annotate(total=Sum('qty')).values_list('product_id', 'total')
+    )
+
+
+def available_stock(product_ids, now=None):
+    """
+    {product_id: units not held by anyone}. Served from cache; misses are
+    filled with one stock query and one grouped holds query.
+    """
+    product_ids = list(product_ids)
+    keys = {AVAILABLE_CACHE_KEY.format(pk): pk for pk in product_ids}
+    found = {keys[k]: v for k, v in cache.get_many(keys).items()}
+
+    missing = [pk for pk in product_ids if pk not in found]
+    if missing:
+        now = now or timezone.now()
+        stock = dict(Product.objects.filter(pk__in=missing).values_list('id', 'stock_quantity'))
+        held = _held(missing, now)
+        fresh = {pk: max(stock.get(pk, 0) - held.get(pk, 0), 0) for pk in missing}
+        cache.set_many(
+            {AVAILABLE_CACHE_KEY.format(pk): v for pk, v in fresh.items()}, AVAILABLE_TIMEOUT
+        )
+        found.update(fresh)
+    return found
+
+
+def attach_available_stock(products):
+    """Set product.available_stock on a page of products (one cache round trip)."""
+    products = list(products)
+    available = available_stock(p.pk for p in products)
+    for product in products:
+        product.available_stock = available.get(product.pk, 0)
+        product.low_stock = 0 < product.available_stock <= LOW_STOCK_THRESHOLD
+    return products
+
+
+def invalidate_available(product_ids):
+    cache.delete_many([AVAILABLE_CACHE_KEY.format(pk) for pk in product_ids])
+
+
+# ---------------- Holds ----------------
+
+def reserve(cart, quantities, now=None):
+    """
+    Hold {product_id: qty} for `cart` until now + RESERVATION_TTL_MINUTES,
+    replacing the cart's previous holds on those products. The holds are
+    written first and then checked against stock, so on SQLite the check runs
+    under the write lock. If any product is short, nothing is kept and
+    {product_id: units still available to this cart} is returned; an empty
+    dict means everything is held.
+    """
+    if not quantities:
+        return {}
+    now = now or timezone.now()
+    expires = now + reservation_ttl()
+
+    with transaction.atomic():
+        existing = {r.product_id: r for r in cart.reservations.filter(product_id__in=quantities)}
+        to_update, to_create = [], []
+        for pk, qty in quantities.items():
+            if pk in existing:
+                existing[pk].qty = qty
+                existing[pk].expires_at = expires
+                to_update.append(existing[pk])
+            else:
+                to_create.append(StockReservation(cart=cart, product_id=pk, qty=qty, expires_at=expires))
+        StockReservation.objects.bulk_update(to_update, ['qty', 'expires_at'])
+        StockReservation.objects.bulk_create(to_create)
+
+        stock = dict(Product.objects.filter(pk__in=quantities).values_list('id', 'stock_quantity'))
+        held = _held(quantities, now)
+        short = {
+            pk: max(stock.get(pk, 0) - (held.get(pk, 0) - qty), 0)
+            for pk, qty in quantities.items()
+            if held.get(pk, 0) > stock.get(pk, 0)
+        }
+        if short:
+            transaction.set_rollback(True)
+
+    if not short:
+        transaction.on_commit(lambda: invalidate_available(list(quantities)))
+    return short
+
+
+def release(cart, product_ids=None):
+    """Drop a cart's holds (a removed line, or everything once ordered)."""
+    qs = StockReservation.objects.filter(cart=cart)
+    if product_ids is not None:
+        qs = qs.filter(product_id__in=product_ids)
+    released = list(qs.values_list('product_id', flat=True))
+    qs.delete()
+    transaction.on_commit(lambda: invalidate_available(released))
+
+
+def release_expired(now=None, batch_size=1000):
+    """
+    Bulk sweep of expired holds. Returns the number of holds released.
+    Requests never do this themselves; expired holds are already ignored
+    when computing availability.
+    """
+    now = now or timezone.now()
+    released = 0
+    while True:
+        batch = list(
+            StockReservation.objects.filter(expires_at__lte=now)
+            .values_list('id', 'product_id')[:batch_size]
+        )
+        if not batch:
+            break
+        StockReservation.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+        invalidate_available({product_id for _, product_id in batch})
+        released += len(batch)
+    return released
+
+
+# ---------------- Ledger ----------------
+
+def record_movements(movements):
+    """
+    Append InventoryMovement rows (unsaved instances) in one bulk_create.
+    Callers update Product.stock_quantity themselves, in the same transaction.
+    """
+    movements = [m for m in movements if m.qty]
+    if movements:
+        InventoryMovement.objects.bulk_create(movements)
+    return movements
+
+
+def record_stock_edit(product, created=False):
+    """
+    Log a stock_quantity edit made through save() (ProductForm, admin
+    list_editable) as the delta from the value that was loaded.
+    """
+    before = 0 if created else getattr(product, '_loaded_stock_quantity', None)
+    if before is None:
+        return
+    delta = product.stock_quantity - before
+    if delta:
+        kind = InventoryMovement.RESTOCK if created else InventoryMovement.ADJUST
+        record_movements([InventoryMovement(product=product, kind=kind, qty=delta)])
+    product._loaded_stock_quantity = product.stock_quantity
+
+
+def move_stock(product_id, qty, kind, order=None, note=''):
+    """
+    Returns, restocks and other one-off movements: shift stock_quantity with
+    F() and log the movement in one transaction.
+    """
+    with transaction.atomic():
+        Product.objects.filter(pk=product_id).update(stock_quantity=F('stock_quantity') + qty)
+        record_movements([
+            InventoryMovement(product_id=product_id, kind=kind, qty=qty, order=order, note=note)
+        ])
+    transaction.on_commit(lambda: invalidate_available([product_id]))
+
+
+def _after_snapshot(qs):
+    """Movements newer than their product's snapshot (or all, if it has none)."""
+    return qs.filter(
+        Q(product__inventory_snapshot__isnull=True)
+        | Q(id__gt=F('product__inventory_snapshot__movement_id'))
+    )
+
+
+def ledger_stock(product_ids):
+    """
+    {product_id: stock according to the ledger}: snapshot + the movements
+    after it. Two queries; the tail stays short as long as snapshots run.
+    """
+    product_ids = list(product_ids)
+    stock = dict(
+        InventorySnapshot.objects.filter(product_id__in=product_ids)
+        .values_list('product_id', 'quantity')
+    )
+    tail = _after_snapshot(InventoryMovement.objects.filter(product_id__in=product_ids))
+    for pk, delta in tail.values('product_id').annotate(total=Sum('qty')).values_list('product_id', 'total'):
+        stock[pk] = stock.get(pk, 0) + delta
+    return {pk: stock.get(pk, 0) for pk in product_ids}
+
+
+def take_snapshots(batch_size=1000, prune_before=None):
+    """
+    Fold every product's movement tail into its snapshot, in batches of
+    products. With `prune_before` (a datetime), movements already folded into
+    a snapshot and older than that are deleted. Returns snapshots written.
+    """
+    upto = InventoryMovement.objects.aggregate(m=Max('id'))['m'] or 0
+    written = 0
+    ids = Product.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=batch_size)
+    batch = []
+    for pk in ids:
+        batch.append(pk)
+        if len(batch) == batch_size:
+            written += _snapshot_batch(batch, upto)
+            batch = []
+    if batch:
+        written += _snapshot_batch(batch, upto)
+
+    if prune_before is not None:
+        InventoryMovement.objects.filter(
+            created_at__lt=prune_before,
+            id__lte=F('product__inventory_snapshot__movement_id'),
+        ).delete()
+    return written
+
+
+def _snapshot_batch(product_ids, upto):
+    with transaction.atomic():
+        existing = {s.product_id: s for s in InventorySnapshot.objects.filter(product_id__in=product_ids)}
+        tail = dict(
+            _after_snapshot(InventoryMovement.objects.filter(product_id__in=product_ids, id__lte=upto))
+            .values('product_id').annotate(total=Sum('qty')).values_list('product_id', 'total')
+        )
+        to_update, to_create = [], []
+        now = timezone.now()
+        for pk in product_ids:
+            snap = existing.get(pk)
+            if snap is None:
+                to_create.append(InventorySnapshot(product_id=pk, quantity=tail.get(pk, 0), movement_id=upto))
+            else:
+                snap.quantity += tail.get(pk, 0)
+                snap.movement_id = upto
+                snap.taken_at = now
+                to_update.append(snap)
+        InventorySnapshot.objects.bulk_update(to_update, ['quantity', 'movement_id', 'taken_at'])
+        InventorySnapshot.objects.bulk_create(to_create)
+    return len(product_ids)
+
+
+def reconcile_stock(batch_size=1000, dry_run=False):
+    """
+    Stream every product and rebuild stock_quantity from the ledger.
+    Yields (product_id, counter, ledger) for each product that drifted.
+    """
+    products = Product.objects.order_by('id').only('id', 'stock_quantity').iterator(chunk_size=batch_size)
+    batch = []
+    for product in products:
+        batch.append(product)
+        if len(batch) == batch_size:
+            yield from _reconcile_batch(batch, dry_run)
+            batch = []
+    if batch:
+        yield from _reconcile_batch(batch, dry_run)
+
+
+def _reconcile_batch(products, dry_run):
+    ledger = ledger_stock(p.pk for p in products)
+    drifted = []
+    for product in products:
+        expected = max(ledger[product.pk], 0)
+        if product.stock_quantity != expected:
+            drifted.append((product.pk, product.stock_quantity, expected))
+            product.stock_quantity = expected
+    if drifted and not dry_run:
+        changed = [p for p in products if p.pk in {d[0] for d in drifted}]
+        Product.objects.bulk_update(changed, ['stock_quantity'])
+        invalidate_available([d[0] for d in drifted])
+    return drifted
@@ -0,0 +1,182 @@
+import random
+import traceback
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+
+Task = namedtuple('Task', 'func max_attempts backoff concurrency')
+
+_registry = {}
+
+# candidates looked at per claim; enough to step over concurrency-limited ones
+CLAIM_WINDOW = 20
+
+
+def task(name, max_attempts=5, backoff=30, concurrency=None):
+    """
+    Register a function as a job. Payload keys become keyword arguments.
+    A failed run is retried after backoff * 2**(attempt - 1) seconds (plus a
+    little jitter) until max_attempts; `concurrency` caps how many of this
+    task run at once across workers.
+    """
+    def register(func):
+        _registry[name] = Task(func, max_attempts, backoff, concurrency)
+        return func
+    return register
+
+
+def get_task(name):
+    return _registry.get(name)
+
+
+def enqueue(name, payload=None, run_at=None, queue='default', unique_key=None):
+    """
+    Queue a job. Call it inside the transaction.atomic() block that writes the
+    data the job refers to, so the row commits (or rolls back) together with
+    it. With `unique_key`, a second enqueue of the same key is a no-op and
+    returns None.
+    """
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                name=name,
+                payload=payload or {},
+                queue=queue,
+                run_at=run_at or timezone.now(),
+                unique_key=unique_key,
+            )
+    except IntegrityError:
+        if unique_key is None:
+            raise
+        return None
+
+
+# ---------------- Worker side ----------------
+
+def claim_next(worker_id, queue='default', now=None):
+    """
+    Atomically take the next due job: UPDATE ... WHERE status = 'queued', so
+    only one worker wins each row. Tasks at their concurrency limit are
+    skipped (the running count is read once per claim, so the limit is
+    approximate under many workers).
+    """
+    now = now or timezone.now()
+    candidates = list(
+        Job.objects.filter(status=Job.QUEUED, queue=queue, run_at__lte=now)
+        .order_by('run_at', 'id')
+        .values_list('id', 'name')[:CLAIM_WINDOW]
+    )
+    if not candidates:
+        return None
+
+    running = {}
+    if any(getattr(get_task(name), 'concurrency', None) for _, name in candidates):
+        running = dict(
+            Job.objects.filter(status=Job.RUNNING)
+            .values('name').annotate(n=Count('id')).values_list('name', 'n')
+        )
+
+    for pk, name in candidates:
+        spec = get_task(name)
+        if spec and spec.concurrency and running.get(name, 0) >= spec.concurrency:
+            continue
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """Run one claimed job and record done / retry / failed."""
+    spec = get_task(job.name)
+    now = timezone.now()
+    if spec is None:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED, finished_at=now, last_error=f"Unknown task {job.name!r}",
+        )
+        return False
+
+    try:
+        spec.func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= spec.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.FAILED, finished_at=timezone.now(), last_error=error,
+            )
+        else:
+            delay = spec.backoff * 2 ** (job.attempts - 1)
+            delay += random.uniform(0, delay / 10)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.QUEUED, locked_by='', locked_at=None, last_error=error,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+        return False
+
+    Job.objects.filter(pk=job.pk).update(status=Job.DONE, finished_at=timezone.now())
+    return True
+
+
+def requeue_stale(now=None):
+    """Jobs left 'running' by a worker that died go back to the queue."""
+    now = now or timezone.now()
+    timeout = timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT_SECONDS', 600))
+    return Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timeout).update(
+        status=Job.QUEUED, locked_by='', locked_at=None,
+    )
+
+
+# ---------------- Periodic jobs ----------------
+
+def _cron_field_matches(field, value, low):
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/')
+            step = int(step)
+        if part == '*':
+            start, end = low, None
+        elif '-' in part:
+            start, end = (int(x) for x in part.split('-'))
+        else:
+            start = end = int(part)
+        if value >= start and (end is None or value <= end) and (value - start) % step == 0:
+            return True
+    return False
+
+
+def cron_matches(expr, when):
+    """
+    Minimal cron: "minute hour day month weekday" with *, n, a-b, lists and
+    /step. Weekday 0 is Sunday.
+    """
+    minute, hour, day, month, weekday = expr.split()
+    return (
+        _cron_field_matches(minute, when.minute, 0)
+        and _cron_field_matches(hour, when.hour, 0)
+        and _cron_field_matches(day, when.day, 1)
+        and _cron_field_matches(month, when.month, 1)
+        and _cron_field_matches(weekday, (when.weekday() + 1) % 7, 0)
+    )
+
+
+def schedule_periodic(periodic_jobs, now=None):
+    """
+    Enqueue every periodic job due this minute. The unique key makes this
+    safe to call from several workers; returns the number queued.
+    """
+    now = timezone.localtime(now or timezone.now())
+    queued = 0
+    for expr, name in periodic_jobs:
+        if cron_matches(expr, now):
+            if enqueue(name, unique_key=f"{name}@{now:%Y%m%d%H%M}"):
+                queued += 1
+    return queued
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Product, ProductImage
+
+
+class Command(BaseCommand):
+    help = "Recompute Product.cover_image for every product in one pass"
+
+    def handle(self, *args, **options):
+        # First image per product in cover order, from a single ordered scan
+        covers = {}
+        rows = (
+            ProductImage.objects
+            .order_by("product_id", *ProductImage.COVER_IMAGE_ORDERING)
+            .values_list("id", "product_id")
+            .iterator()
+        )
+        for image_id, product_id in rows:
+            covers.setdefault(product_id, image_id)
+
+        changed = []
+        for product in Product.objects.only("id", "cover_image").iterator():
+            cover_id = covers.get(product.pk)
+            if product.cover_image_id != cover_id:
+                product.cover_image_id = cover_id
+                changed.append(product)
+
+        Product.objects.bulk_update(changed, ["cover_image"], batch_size=500)
+        self.stdout.write(self.style.SUCCESS(f"Updated cover image on {len(changed)} products."))
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.cart import expire_carts
+
+
+class Command(BaseCommand):
+    help = "Delete carts that haven't been touched for CART_EXPIRY_DAYS (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=getattr(settings, "CART_EXPIRY_DAYS", 30),
+            help="Age in days after which an untouched cart is deleted",
+        )
+
+    def handle(self, *args, **options):
+        deleted = expire_carts(options["days"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired carts."))
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Brand, Category
+from core.query_plans import analyze_queries
+
+
+class Command(BaseCommand):
+    help = (
+        "Request storefront / admin pages, EXPLAIN QUERY PLAN every SELECT they "
+        "issue and report full table scans, temp B-trees and index suggestions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="*", help="Paths to check (default: main pages)")
+        parser.add_argument(
+            "--user", help="Username to log in as for admin pages (default: first superuser)"
+        )
+        parser.add_argument("--verbose-plan", action="store_true", help="Print the full plan")
+
+    def default_urls(self):
+        urls = [reverse("home"), reverse("brand_index"), reverse("product_list"),
+                reverse("admin_dashboard"), reverse("admin_order_list") + "?search=017",
+                reverse("search") + "?q=phone"]
+        category = Category.objects.filter(parent__isnull=True).first()
+        if category:
+            urls.append(reverse("category_products", args=[category.slug]))
+        brand = Brand.objects.first()
+        if brand:
+            urls.append(reverse("brand_products", args=[brand.id]))
+        return urls
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            self.stdout.write(self.style.WARNING("EXPLAIN QUERY PLAN analysis needs SQLite."))
+            return
+
+        client = Client(HTTP_HOST="localhost")
+        User = get_user_model()
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+        else:
+            user = User.objects.filter(is_superuser=True).first()
+        if user:
+            client.force_login(user, backend="django.contrib.auth.backends.ModelBackend")
+
+        suggestions = set()
+        for url in options["urls"] or self.default_urls():
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+            reports = analyze_queries(ctx.captured_queries)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{url}  [{response.status_code}]  {len(ctx.captured_queries)} queries, "
+                f"{len(reports)} flagged"
+            ))
+            for report in reports:
+                self.stdout.write(f"  {report['sql'][:200]}")
+                for problem in report["problems"]:
+                    self.stdout.write(self.style.WARNING(f"    ! {problem}"))
+                if options["verbose_plan"]:
+                    for detail in report["plan"]:
+                        self.stdout.write(f"      {detail}")
+                for s in report["suggestions"]:
+                    self.stdout.write(self.style.SUCCESS(f"    + index {s}"))
+                    suggestions.add(s)
+
+        if suggestions:
+            self.stdout.write(self.style.MIGRATE_HEADING("Suggested indexes"))
+            for s in sorted(suggestions):
+                self.stdout.write(f"  {s}")
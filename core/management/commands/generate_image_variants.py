@@ -0,0 +1,48 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile
+from core.images import get_executor, pending_jobs, render_variants
+from core.models import Brand, ProductImage
+
+
+class Command(BaseCommand):
+    help = "Backfill WebP thumb/card/zoom variants for product images, brand logos and avatars"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate existing variants")
+
+    def sources(self):
+        for img in ProductImage.objects.only("image").iterator():
+            yield img.image
+        for brand in Brand.objects.exclude(logo="").exclude(logo__isnull=True).only("logo").iterator():
+            yield brand.logo
+        for profile in Profile.objects.exclude(avatar="").exclude(avatar__isnull=True).only("avatar").iterator():
+            yield profile.avatar
+
+    def handle(self, *args, **options):
+        executor = get_executor()
+        futures = []
+        skipped = 0
+        for fieldfile in self.sources():
+            work = pending_jobs(fieldfile, force=options["force"])
+            if work:
+                futures.append(executor.submit(render_variants, *work))
+            else:
+                skipped += 1
+
+        written = failed = 0
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                written += future.result()
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Failed: {exc}")
+            if done % 100 == 0:
+                self.stdout.write(f"{done}/{len(futures)} images processed")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{written} variants written from {len(futures)} images "
+            f"({skipped} already up to date, {failed} failed)."
+        ))
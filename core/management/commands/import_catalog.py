@@ -0,0 +1,85 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog_import import (
+    IMAGE_WORKERS, IMPORT_BATCH_SIZE, CatalogImporter, RowError,
+    detect_format, load_state, parse_row, read_rows, save_state,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import products (with categories, brands and images) from CSV or JSONL. "
+        "Columns: name, category (\"A > B > C\"), price, and optionally slug, brand, "
+        "old_price, discount_percent, stock_quantity, status, is_active, is_featured, "
+        "short_description, description, images (\"a.jpg|b.jpg\")"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Default: from the file extension")
+        parser.add_argument("--images-dir", help="Where image names are resolved. Default: the file's directory")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--image-workers", type=int, default=IMAGE_WORKERS)
+        parser.add_argument(
+            "--state",
+            help="Progress file for resuming an interrupted import. Default: <path>.import-state",
+        )
+        parser.add_argument("--restart", action="store_true", help="Ignore saved progress and start from row 1")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.isfile(path):
+            raise CommandError(f"No such file: {path}")
+        state_path = options["state"] or f"{path}.import-state"
+        images_dir = options["images_dir"] or os.path.dirname(os.path.abspath(path))
+
+        state = {"done": 0, "complete": False} if options["restart"] else load_state(state_path)
+        if state["complete"]:
+            raise CommandError(
+                f"{path} was already imported (see {state_path}); use --restart to import it again"
+            )
+        done = state["done"]
+        if done:
+            self.stdout.write(f"Resuming after row {done}")
+
+        importer = CatalogImporter(images_dir, image_workers=options["image_workers"])
+        batch = []
+        errors = 0
+        last = done
+
+        def flush():
+            importer.import_batch(batch)
+            # only rows in committed batches count as done
+            save_state(state_path, last)
+            stats = importer.stats
+            self.stdout.write(
+                f"  row {last}: {stats['products']} created, {stats['existing']} already present, "
+                f"{errors} invalid"
+            )
+            batch.clear()
+
+        for number, raw in read_rows(path, options["format"] or detect_format(path)):
+            if number <= done:
+                continue
+            last = number
+            try:
+                batch.append(parse_row(raw))
+            except RowError as exc:
+                errors += 1
+                self.stderr.write(f"Row {number}: {exc}")
+            if len(batch) >= options["batch_size"]:
+                flush()
+        flush()
+        save_state(state_path, last, complete=True)
+
+        self.stdout.write("Waiting for image variants...")
+        failed_variants = importer.finish()
+
+        stats = importer.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['products']} products ({stats['existing']} already present, {errors} invalid rows), "
+            f"{stats['categories']} new categories, {stats['brands']} new brands, {stats['images']} images "
+            f"({stats['missing_images']} missing, {failed_variants} variant renders failed)."
+        ))
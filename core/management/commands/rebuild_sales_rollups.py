@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute SalesRollup rows from orders (all days, or a recent window)"
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument("--since", help="First day to rebuild, YYYY-MM-DD")
+        group.add_argument("--days", type=int, help="Rebuild only the last N days")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be YYYY-MM-DD")
+        elif options["days"]:
+            since = timezone.localdate() - timedelta(days=options["days"] - 1)
+
+        written = rebuild(
+            since=since,
+            progress=lambda n: self.stdout.write(f"  {n} buckets written..."),
+        )
+        scope = f"since {since}" if since else "for all days"
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} rollup buckets {scope}."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the FTS5 product search index from scratch"
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            self.stdout.write(self.style.WARNING("Search index needs SQLite FTS5, nothing to do."))
+            return
+
+        def progress(done, total):
+            self.stdout.write(f"Indexed {done}/{total} products")
+
+        count = rebuild_index(progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({count} products)."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.inventory import reconcile_stock
+
+
+class Command(BaseCommand):
+    help = "Rebuild Product.stock_quantity from the inventory ledger, streaming products in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only report products whose counter disagrees with the ledger",
+        )
+
+    def handle(self, *args, **options):
+        drifted = 0
+        for product_id, counter, ledger in reconcile_stock(options["batch_size"], options["dry_run"]):
+            drifted += 1
+            self.stdout.write(f"  product {product_id}: counter {counter} -> ledger {ledger}")
+
+        verb = "would be fixed" if options["dry_run"] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"{drifted} products {verb}."))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from core.models import HotDeal, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Product.effective_price. Run periodically (e.g. every minute "
+        "from cron) so HotDeals take effect / expire on schedule."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Recompute every product, not only products that have hot deals.",
+        )
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            ids = Product.objects.values_list("id", flat=True)
+        else:
+            # Deals table is small; any product with a deal may have crossed a
+            # start / end boundary since the last run.
+            ids = HotDeal.objects.values_list("product_id", flat=True).distinct()
+
+        ids = list(ids)
+        changed = 0
+        for i in range(0, len(ids), 1000):
+            changed += Product.refresh_effective_prices(ids[i:i + 1000])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {len(ids)} products, updated {changed} effective prices."
+        ))
@@ -0,0 +1,65 @@
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from core import tasks
+from core.jobs import claim_next, requeue_stale, run_job, schedule_periodic
+
+
+def _run(job):
+    try:
+        return run_job(job)
+    finally:
+        # each pool thread has its own connection
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs and schedule periodic ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queue", default="default")
+        parser.add_argument("--concurrency", type=int, default=2, help="Jobs run at once by this worker")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument("--no-periodic", action="store_true", help="Don't schedule PERIODIC_JOBS from this worker")
+        parser.add_argument("--once", action="store_true", help="Drain due jobs and exit")
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        concurrency = max(options["concurrency"], 1)
+        last_minute = None
+        in_flight = set()
+
+        self.stdout.write(f"Worker {worker_id} on queue '{options['queue']}', concurrency {concurrency}")
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                close_old_connections()
+                now = timezone.now()
+                minute = now.replace(second=0, microsecond=0)
+                if minute != last_minute:
+                    last_minute = minute
+                    requeue_stale(now)
+                    if not options["no_periodic"]:
+                        schedule_periodic(tasks.PERIODIC_JOBS, now)
+
+                claimed = False
+                while len(in_flight) < concurrency:
+                    job = claim_next(worker_id, options["queue"])
+                    if job is None:
+                        break
+                    claimed = True
+                    in_flight.add(pool.submit(_run, job))
+
+                if options["once"] and not claimed and not in_flight:
+                    break
+
+                if in_flight:
+                    done, in_flight = wait(in_flight, timeout=options["sleep"], return_when=FIRST_COMPLETED)
+                    in_flight = set(in_flight)
+                elif not claimed:
+                    time.sleep(options["sleep"])
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.inventory import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Fold the inventory ledger into per-product snapshots (run nightly from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--prune-days", type=int, default=None,
+            help="Also delete snapshotted movements older than this many days",
+        )
+
+    def handle(self, *args, **options):
+        prune_before = None
+        if options["prune_days"] is not None:
+            prune_before = timezone.now() - timedelta(days=options["prune_days"])
+        written = take_snapshots(options["batch_size"], prune_before=prune_before)
+        self.stdout.write(self.style.SUCCESS(f"Snapshotted {written} products."))
@@ -0,0 +1,45 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .query_plans import analyze_queries
+
+logger = logging.getLogger('core.query_plans')
+
+
+class QueryPlanMiddleware:
+    """
+    Optional: EXPLAIN QUERY PLAN every SELECT a view runs and log full table
+    scans / temp B-trees with an index suggestion. Enable with
+    QUERY_PLAN_LOGGING = True (development only, it doubles query count).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PLAN_LOGGING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        captured = []
+
+        def capture(execute, sql, params, many, context):
+            if not many:
+                captured.append((sql, params or ()))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            response = self.get_response(request)
+
+        view = getattr(request, 'resolver_match', None)
+        view_name = view.view_name if view else request.path
+        for report in analyze_queries(captured):
+            logger.warning(
+                "[%s] %s\n  plan: %s\n  suggest: %s",
+                view_name,
+                report['sql'],
+                ' | '.join(report['problems']),
+                ', '.join(report['suggestions']) or '-',
+            )
+        return response
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    Category = apps.get_model('core', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+
+    def build(pk):
+        chain = []
+        while pk is not None:
+            chain.append(pk)
+            pk = parents.get(pk)
+        return '/'.join(str(i) for i in reversed(chain)) + '/'
+
+    for pk in parents:
+        path = build(pk)
+        Category.objects.filter(pk=pk).update(path=path, depth=path.count('/') - 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_product_specifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
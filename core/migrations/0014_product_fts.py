@@ -0,0 +1,54 @@
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+CREATE_FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS core_product_fts USING fts5(
+    name, short_description, description, specifications, brand, category,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Product = apps.get_model('core', 'Product')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_FTS_SQL)
+        rows = [
+            (
+                p.pk,
+                p.name or '',
+                strip_tags(p.short_description or ''),
+                strip_tags(p.description or ''),
+                strip_tags(p.specifications or ''),
+                p.brand.name if p.brand_id else '',
+                p.category.name if p.category_id else '',
+            )
+            for p in Product.objects.filter(is_active=True).select_related('brand', 'category').iterator()
+        ]
+        cursor.executemany(
+            "INSERT INTO core_product_fts "
+            "(rowid, name, short_description, description, specifications, brand, category) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS core_product_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_category_path_depth'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_effective_price(apps, schema_editor):
+    Product = apps.get_model('core', 'Product')
+    HotDeal = apps.get_model('core', 'HotDeal')
+
+    now = timezone.now()
+    deal_prices = dict(
+        HotDeal.objects.filter(start_date__lte=now, end_date__gte=now)
+        .values('product_id').annotate(best=models.Min('special_price'))
+        .values_list('product_id', 'best')
+    )
+
+    products = list(Product.objects.only('id', 'price', 'discount_percent'))
+    for p in products:
+        price = p.price
+        if p.discount_percent > 0:
+            price = p.price - (p.price * p.discount_percent / 100)
+        price = Decimal(price).quantize(Decimal('0.01'))
+        deal = deal_prices.get(p.pk)
+        p.effective_price = deal if deal is not None and deal < price else price
+    Product.objects.bulk_update(products, ['effective_price'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(populate_effective_price, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='core_prod_price_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price', 'id'], name='core_prod_effprice_id_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_cover_images(apps, schema_editor):
+    Product = apps.get_model('core', 'Product')
+    ProductImage = apps.get_model('core', 'ProductImage')
+
+    covers = {}
+    for image_id, product_id in (
+        ProductImage.objects.order_by('product_id', '-is_banner', 'sort_order', 'id')
+        .values_list('id', 'product_id')
+    ):
+        covers.setdefault(product_id, image_id)
+
+    products = list(Product.objects.filter(pk__in=covers).only('id'))
+    for p in products:
+        p.cover_image_id = covers[p.pk]
+    Product.objects.bulk_update(products, ['cover_image'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_query_plan_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.productimage'),
+        ),
+        migrations.RunPython(populate_cover_images, migrations.RunPython.noop),
+    ]
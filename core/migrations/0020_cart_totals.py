@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+
+def populate_totals(apps, schema_editor):
+    Cart = apps.get_model('core', 'Cart')
+    CartItem = apps.get_model('core', 'CartItem')
+    line_total = ExpressionWrapper(
+        F('qty') * F('product__effective_price'),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    rows = (
+        CartItem.objects.values('cart_id')
+        .annotate(total_qty=Sum('qty'), amount=Sum(line_total))
+    )
+    carts = []
+    for row in rows:
+        carts.append(Cart(pk=row['cart_id'], total_qty=row['total_qty'] or 0, total_amount=row['amount'] or 0))
+    Cart.objects.bulk_update(carts, ['total_qty', 'total_amount'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_cart_cartitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='total_qty',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
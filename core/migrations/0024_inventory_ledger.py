@@ -0,0 +1,49 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_snapshots(apps, schema_editor):
+    # The ledger starts from today's counters: one snapshot per product, no movements.
+    Product = apps.get_model('core', 'Product')
+    InventorySnapshot = apps.get_model('core', 'InventorySnapshot')
+    snapshots = [
+        InventorySnapshot(product_id=pk, quantity=stock, movement_id=0)
+        for pk, stock in Product.objects.values_list('id', 'stock_quantity').iterator()
+    ]
+    InventorySnapshot.objects.bulk_create(snapshots, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_stockreservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('sale', 'Sale'), ('return', 'Return'), ('restock', 'Restock'), ('adjust', 'Manual adjustment')], max_length=10)),
+                ('qty', models.IntegerField()),
+                ('note', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='core.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='core.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'id'], name='core_move_product_id_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('movement_id', models.BigIntegerField(default=0)),
+                ('taken_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_snapshot', to='core.product')),
+            ],
+        ),
+        migrations.RunPython(seed_snapshots, migrations.RunPython.noop),
+    ]
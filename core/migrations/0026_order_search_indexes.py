@@ -0,0 +1,50 @@
+import re
+
+from django.db import migrations, models
+
+
+def normalize_bd_phone(phone):
+    # Frozen copy of accounts.utils.normalize_bd_phone, so later edits to
+    # that helper can't change what this migration writes.
+    digits = re.sub(r"\D", "", phone or "")
+    if digits.startswith("880"):
+        digits = digits[2:]
+    return digits
+
+
+def populate_mobile_normalized(apps, schema_editor):
+    Order = apps.get_model('core', 'Order')
+    batch = []
+    for order in Order.objects.only('id', 'mobile').iterator(chunk_size=2000):
+        order.mobile_normalized = normalize_bd_phone(order.mobile)
+        batch.append(order)
+        if len(batch) >= 2000:
+            Order.objects.bulk_update(batch, ['mobile_normalized'])
+            batch = []
+    if batch:
+        Order.objects.bulk_update(batch, ['mobile_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='mobile_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='email',
+            field=models.EmailField(db_index=True, max_length=254),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['total', 'id'], name='core_order_total_id_idx'),
+        ),
+        migrations.RunPython(populate_mobile_normalized, migrations.RunPython.noop),
+    ]
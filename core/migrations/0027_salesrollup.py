@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_order_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('district', models.CharField(blank=True, default='', max_length=100)),
+                ('upazila', models.CharField(blank=True, default='', max_length=100)),
+                ('delivery_method', models.CharField(blank=True, default='', max_length=50)),
+                ('payment_method', models.CharField(blank=True, default='', max_length=50)),
+                ('payment_status', models.CharField(blank=True, default='', max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('subtotal', models.FloatField(default=0)),
+                ('discount', models.FloatField(default=0)),
+                ('delivery_charge', models.FloatField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('amount_paid', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'payment_status'], name='core_rollup_day_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'district', 'upazila', 'delivery_method', 'payment_method', 'payment_status'), name='core_rollup_bucket_unique')],
+            },
+        ),
+    ]
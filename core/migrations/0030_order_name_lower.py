@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+def populate_name_lower(apps, schema_editor):
+    Order = apps.get_model('core', 'Order')
+    batch = []
+    for order in Order.objects.only('id', 'first_name', 'last_name').iterator(chunk_size=2000):
+        order.first_name_lower = (order.first_name or '').lower()
+        order.last_name_lower = (order.last_name or '').lower()
+        batch.append(order)
+        if len(batch) >= 2000:
+            Order.objects.bulk_update(batch, ['first_name_lower', 'last_name_lower'])
+            batch = []
+    if batch:
+        Order.objects.bulk_update(batch, ['first_name_lower', 'last_name_lower'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_product_admin_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='first_name_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='last_name_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(populate_name_lower, migrations.RunPython.noop),
+    ]
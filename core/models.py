@@ -1,7 +1,14 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr, Upper
+from django.utils import timezone
 from django.utils.text import slugify
 from ckeditor.fields import RichTextField
 
+from accounts.utils import normalize_bd_phone
+
 class Brand(models.Model):
     name = models.CharField(max_length=100, unique=True)
     logo = models.ImageField(upload_to='brands/logos/', blank=True, null=True)
@@ -27,11 +34,20 @@ class Category(models.Model):
         blank=True,
         null=True
     )
+
+    # Materialized path of ancestor ids, e.g. "1/5/12/" (always ends with "/").
+    # Kept in sync by save() so subtree / breadcrumb lookups are one query.
+    path = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     
     class Meta:
         verbose_name_plural = "Categories"
         unique_together = ('parent', 'slug')  # slug unique per parent
         ordering = ['parent__name', 'name']
+        indexes = [
+            models.Index(fields=['parent', 'name'], name='core_cat_parent_name_idx'),
+            models.Index(fields=['depth', 'name'], name='core_cat_depth_name_idx'),
+        ]
 
     def __str__(self):
         # show parent in string optionally
@@ -56,7 +72,58 @@ class Category(models.Model):
             counter += 1
 
         self.slug = slug
-        super().save(*args, **kwargs) 
+
+        old_path = self.path
+        super().save(*args, **kwargs)
+
+        # Rebuild path / depth now that we have a pk
+        parent_path = self.parent.path if self.parent else ''
+        new_path = f"{parent_path}{self.pk}/"
+        if new_path != old_path:
+            new_depth = new_path.count('/') - 1
+            Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+
+            # Moved node: re-root the whole subtree in a single UPDATE
+            if old_path:
+                Category.objects.filter(
+                    path__gt=old_path, path__lt=old_path[:-1] + '0'
+                ).update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + (new_depth - self.depth),
+                )
+            self.path = new_path
+            self.depth = new_depth
+
+    @staticmethod
+    def subtree_filter(path, prefix=''):
+        """
+        Range lookup matching every category whose path starts with `path`.
+        '/' sorts right before '0', so [path, path[:-1] + '0') is exactly the
+        prefix range and can use the path index (LIKE can't on SQLite).
+        """
+        return {
+            f'{prefix}path__gte': path,
+            f'{prefix}path__lt': path[:-1] + '0',
+        }
+
+    def get_descendants(self, include_self=False):
+        qs = Category.objects.filter(**Category.subtree_filter(self.path))
+        if not include_self:
+            qs = qs.exclude(pk=self.pk)
+        return qs
+
+    def get_descendant_ids(self, include_self=True):
+        return list(self.get_descendants(include_self).values_list('id', flat=True))
+
+    def get_ancestor_ids(self, include_self=False):
+        ids = [int(i) for i in self.path.split('/') if i]
+        return ids if include_self else ids[:-1]
+
+    def get_ancestors(self, include_self=False):
+        """Root-first ancestors, for breadcrumbs."""
+        return Category.objects.filter(
+            id__in=self.get_ancestor_ids(include_self)
+        ).order_by('depth')
 
 
 class Product(models.Model):
@@ -77,6 +144,11 @@ class Product(models.Model):
     old_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     discount_percent = models.PositiveIntegerField(default=0)
     
+    # What the customer actually pays right now: list price after
+    # discount_percent, or an active HotDeal's special_price if lower.
+    # Denormalized so price filters / sorts / facets stay in the database.
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+
     stock_quantity = models.PositiveIntegerField(default=0)
     rating = models.FloatField(default=0.0)
     
@@ -85,19 +157,120 @@ class Product(models.Model):
     is_active = models.BooleanField(default=True)
     brand = models.ForeignKey(Brand, on_delete=models.CASCADE, blank=True, null=True, related_name='brand')
 
+    # Listing thumbnail: first of images ordered by COVER_IMAGE_ORDERING.
+    # Maintained from ProductImage save / delete so cards can select_related it.
+    cover_image = models.ForeignKey(
+        'ProductImage',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        editable=False,
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination (sort field, id) - see core.pagination
+            models.Index(fields=['created_at', 'id'], name='core_prod_created_id_idx'),
+            models.Index(fields=['effective_price', 'id'], name='core_prod_effprice_id_idx'),
+            # storefront listings: is_active + scope + newest first
+            models.Index(fields=['is_active', 'created_at', 'id'], name='core_prod_active_created_idx'),
+            models.Index(fields=['category', 'is_active', 'created_at'], name='core_prod_cat_active_idx'),
+            models.Index(fields=['brand', 'is_active', 'created_at'], name='core_prod_brand_active_idx'),
+            # low-stock lists and counts on the admin dashboard
+            models.Index(fields=['is_active', 'stock_quantity'], name='core_prod_active_stock_idx'),
+            # admin product list sorts (core.product_filters)
+            models.Index(fields=['updated_at', 'id'], name='core_prod_updated_id_idx'),
+            models.Index(fields=['name', 'id'], name='core_prod_name_id_idx'),
+            models.Index(fields=['price', 'id'], name='core_prod_price_id_idx'),
+            models.Index(fields=['stock_quantity', 'id'], name='core_prod_stock_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # stock as loaded, so a later save() can log the edit as a ledger delta
+        if 'stock_quantity' in field_names:
+            instance._loaded_stock_quantity = instance.stock_quantity
+        return instance
+
     def get_discount_price(self):
         """Returns price after discount if available."""
         if self.discount_percent > 0:
             return self.price - (self.price * self.discount_percent / 100)
         return self.price
+
+    def get_savings(self):
+        """old_price minus what the customer pays now (effective_price); 0 if not cheaper."""
+        if self.old_price and self.old_price > self.effective_price:
+            return self.old_price - self.effective_price
+        return 0
+
+    def price_with_deal(self, deal_price=None):
+        """Discounted price, or `deal_price` (best running HotDeal) if cheaper."""
+        price = Decimal(self.get_discount_price()).quantize(Decimal('0.01'))
+        if deal_price is not None and deal_price < price:
+            price = deal_price
+        return price
+
+    def compute_effective_price(self, now=None):
+        """Discounted price, or the lowest currently running HotDeal if cheaper."""
+        deal_price = None
+        if self.pk:
+            now = now or timezone.now()
+            deal_price = self.hot_deals.filter(
+                start_date__lte=now, end_date__gte=now
+            ).aggregate(models.Min('special_price'))['special_price__min']
+        return self.price_with_deal(deal_price)
+
+    def refresh_cover_image(self):
+        """Re-pick the cover image (banner first, then sort_order) and store it."""
+        cover = self.images.order_by(*ProductImage.COVER_IMAGE_ORDERING).first()
+        self.cover_image = cover
+        Product.objects.filter(pk=self.pk).update(cover_image=cover)
+
+    def refresh_effective_price(self, now=None):
+        """Recompute and store effective_price without a full save()."""
+        self.effective_price = self.compute_effective_price(now)
+        Product.objects.filter(pk=self.pk).update(effective_price=self.effective_price)
+
+    @classmethod
+    def refresh_effective_prices(cls, product_ids, now=None):
+        """
+        Bulk recompute for many products: one query for the products, one for
+        their running deals, one bulk_update. Returns number of changed rows.
+        """
+        now = now or timezone.now()
+        products = list(cls.objects.filter(pk__in=product_ids).only(
+            'id', 'price', 'discount_percent', 'effective_price'
+        ))
+        deal_prices = dict(
+            HotDeal.objects.filter(
+                product_id__in=[p.pk for p in products],
+                start_date__lte=now, end_date__gte=now,
+            ).values('product_id').annotate(
+                best=models.Min('special_price')
+            ).values_list('product_id', 'best')
+        )
+
+        changed = []
+        for product in products:
+            price = product.price_with_deal(deal_prices.get(product.pk))
+            if price != product.effective_price:
+                product.effective_price = price
+                changed.append(product)
+
+        cls.objects.bulk_update(changed, ['effective_price'], batch_size=500)
+        return len(changed)
         
     def save(self, *args, **kwargs):
+        self.effective_price = self.compute_effective_price()
         if not self.slug:
             base_slug = slugify(self.name)
             slug = base_slug
@@ -120,6 +293,8 @@ class ProductImage(models.Model):
     is_banner = models.BooleanField(default=False)
     sort_order = models.PositiveIntegerField(default=0)
 
+    COVER_IMAGE_ORDERING = ('-is_banner', 'sort_order', 'id')
+
     def __str__(self):
         return f"{self.product.name} Image"
 
@@ -137,7 +312,6 @@ class HotDeal(models.Model):
 
 
 from django.db import models
-from django.utils import timezone
 
 class Coupon(models.Model):
     COUPON_TYPES = (
@@ -151,6 +325,17 @@ class Coupon(models.Model):
     is_active = models.BooleanField(default=True)
     expiry_date = models.DateField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # case-insensitive code lookups (see Coupon.get_by_code)
+            models.Index(Upper('code'), name='core_coupon_code_upper_idx'),
+        ]
+
+    @classmethod
+    def get_by_code(cls, code):
+        """Case-insensitive lookup that can use the UPPER(code) index (iexact can't)."""
+        return cls.objects.annotate(code_upper=Upper('code')).get(code_upper=code.upper())
+
     def is_valid(self):
         if not self.is_active:
             return False
@@ -171,9 +356,16 @@ class Order(models.Model):
     
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
+    # lowercased copies of the names, for indexed prefix search in the admin
+    # order list (istartswith is a LIKE, which SQLite can't serve from an index)
+    first_name_lower = models.CharField(max_length=100, blank=True, default='', db_index=True, editable=False)
+    last_name_lower = models.CharField(max_length=100, blank=True, default='', db_index=True, editable=False)
     address = models.TextField()
     mobile = models.CharField(max_length=20)
-    email = models.EmailField()
+    # digits-only local form of `mobile` (see normalize_bd_phone), for
+    # indexed exact / prefix search in the admin order list
+    mobile_normalized = models.CharField(max_length=20, blank=True, default='', db_index=True, editable=False)
+    email = models.EmailField(db_index=True)
 
     upazila = models.CharField(max_length=100)
     district = models.CharField(max_length=100)
@@ -202,8 +394,25 @@ class Order(models.Model):
     discount = models.FloatField(default=0)
     total = models.FloatField()
 
+    # Idempotency key issued with the checkout form; a replayed POST finds
+    # the order by it instead of placing a second one.
+    checkout_token = models.CharField(max_length=64, unique=True, blank=True, null=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='core_order_created_idx'),
+            models.Index(fields=['payment_status', 'created_at'], name='core_order_status_created_idx'),
+            models.Index(fields=['total', 'id'], name='core_order_total_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.mobile_normalized = normalize_bd_phone(self.mobile)
+        self.first_name_lower = (self.first_name or '').lower()
+        self.last_name_lower = (self.last_name or '').lower()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Order #{self.id}"
     
@@ -218,3 +427,183 @@ class OrderItem(models.Model):
         return self.price * self.qty
  
 
+
+
+class Cart(models.Model):
+    """
+    Server-side cart. The session only carries `cart_id`; lines live in
+    CartItem as (product, qty) so every click is a single-row write.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='carts'
+    )
+    # running totals, moved by core.cart on every line change
+    total_qty = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # bumped on every write; keys the cached pricing pass (core.pricing)
+    version = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"Cart #{self.id}"
+
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    qty = models.PositiveIntegerField(default=1)
+    # price the customer last saw for this line, to flag changes at checkout
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'product'], name='core_cartitem_unique_product'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} x {self.qty}"
+
+
+class StockReservation(models.Model):
+    """
+    Time-limited hold of `qty` units for a cart (add to cart / checkout).
+    Available stock is stock_quantity minus unexpired holds; expired rows are
+    removed in bulk by `manage.py release_reservations`.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='reservations')
+    qty = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'product'], name='core_reservation_unique_product'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'expires_at'], name='core_resv_product_exp_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} x {self.qty} until {self.expires_at}"
+
+
+class InventoryMovement(models.Model):
+    """
+    Append-only stock ledger. `qty` is signed (sales negative); stock is the
+    latest InventorySnapshot plus the movements after it. See core.inventory.
+    """
+    SALE = 'sale'
+    RETURN = 'return'
+    RESTOCK = 'restock'
+    ADJUST = 'adjust'
+    KIND_CHOICES = (
+        (SALE, 'Sale'),
+        (RETURN, 'Return'),
+        (RESTOCK, 'Restock'),
+        (ADJUST, 'Manual adjustment'),
+    )
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='movements')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    qty = models.IntegerField()
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='movements')
+    note = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'id'], name='core_move_product_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.qty:+d} of {self.product_id}"
+
+
+class InventorySnapshot(models.Model):
+    """Stock of a product as of ledger row `movement_id` (inclusive)."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='inventory_snapshot')
+    quantity = models.IntegerField()
+    movement_id = models.BigIntegerField(default=0)
+    taken_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product_id}: {self.quantity} @ {self.movement_id}"
+
+
+class Job(models.Model):
+    """
+    Background job stored in our own database; run by `manage.py run_jobs`.
+    See core.jobs for enqueue / claim / retry and core.tasks for the tasks.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    queue = models.CharField(max_length=50, default='default')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+    # periodic runs use "<name>@<minute>" so two workers can't both schedule one
+    unique_key = models.CharField(max_length=150, unique=True, null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'queue', 'run_at'], name='core_job_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+
+class SalesRollup(models.Model):
+    """
+    Order totals per day x district x upazila x delivery x payment method x
+    payment status. Kept current incrementally by core.rollups; reports read
+    these rows instead of scanning Order.
+    """
+    day = models.DateField()
+    district = models.CharField(max_length=100, blank=True, default='')
+    upazila = models.CharField(max_length=100, blank=True, default='')
+    delivery_method = models.CharField(max_length=50, blank=True, default='')
+    payment_method = models.CharField(max_length=50, blank=True, default='')
+    payment_status = models.CharField(max_length=20, blank=True, default='')
+
+    orders = models.IntegerField(default=0)
+    subtotal = models.FloatField(default=0)
+    discount = models.FloatField(default=0)
+    delivery_charge = models.FloatField(default=0)
+    total = models.FloatField(default=0)
+    amount_paid = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'district', 'upazila', 'delivery_method', 'payment_method', 'payment_status'],
+                name='core_rollup_bucket_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'payment_status'], name='core_rollup_day_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.district}/{self.upazila} {self.payment_status}: {self.orders}"
@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.db.models import F
+
+from .inventory import invalidate_available, record_movements
+from .jobs import enqueue
+from .models import InventoryMovement, Order, OrderItem, Product, StockReservation
+from .rollups import record_order
+
+
+class OutOfStock(Exception):
+    """Raised by place_order when a line can't be covered; nothing is written."""
+
+    def __init__(self, names):
+        self.names = names
+        super().__init__(f"Not enough stock for: {', '.join(names)}")
+
+
+def place_order(lines, cart=None, **order_fields):
+    """
+    Create an Order with its items and take the stock, all or nothing.
+
+    `lines` is the priced cart ({"<product_id>": {"name", "price", "qty"}}).
+    Stock is taken with conditional UPDATE ... SET stock_quantity =
+    stock_quantity - qty WHERE stock_quantity >= qty, so two buyers racing
+    for the last unit can't both win; if any line comes up short the whole
+    transaction rolls back and OutOfStock lists the products. Items are
+    written with one bulk_create, keeping the write lock short. The cart's
+    stock holds are consumed, the sales logged to the inventory ledger, the
+    order counted in its sales rollup and its follow-up job (confirmation
+    email) queued in the same transaction.
+    """
+    short = []
+    with transaction.atomic():
+        # fixed order so concurrent checkouts lock rows the same way
+        for pid in sorted(lines, key=int):
+            line = lines[pid]
+            taken = Product.objects.filter(
+                pk=int(pid), is_active=True, stock_quantity__gte=line['qty']
+            ).update(stock_quantity=F('stock_quantity') - line['qty'])
+            if not taken:
+                short.append(line['name'])
+        if short:
+            raise OutOfStock(short)
+
+        order = Order.objects.create(**order_fields)
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_name=line['name'],
+                price=line['price'],
+                qty=line['qty'],
+            )
+            for line in lines.values()
+        ])
+        record_movements([
+            InventoryMovement(product_id=int(pid), kind=InventoryMovement.SALE, qty=-line['qty'], order=order)
+            for pid, line in lines.items()
+        ])
+        record_order(order)
+        enqueue('orders.placed', {'order_id': order.pk})
+        if cart is not None:
+            StockReservation.objects.filter(cart=cart).delete()
+        ordered = [int(pid) for pid in lines]
+        transaction.on_commit(lambda: invalidate_available(ordered))
+    return order
@@ -0,0 +1,127 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+# sort key -> (field, descending). `id` is always the tie breaker.
+PRODUCT_SORTS = {
+    'newest': ('created_at', True),
+    'oldest': ('created_at', False),
+    'price_low': ('effective_price', False),
+    'price_high': ('effective_price', True),
+}
+DEFAULT_SORT = 'newest'
+PAGE_SIZE = 24
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _decode(field, raw):
+    if field in ('created_at', 'updated_at'):
+        return datetime.fromisoformat(raw)
+    if field in ('id', 'stock_quantity'):
+        return int(raw)
+    if field == 'name':
+        return raw
+    return Decimal(raw)
+
+
+def make_cursor(obj, field, direction):
+    payload = json.dumps({'v': _encode(getattr(obj, field)), 'id': obj.pk, 'd': direction})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def parse_cursor(token, field):
+    """Returns (value, id, direction) or None for a missing / tampered token."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = data['d'] if data['d'] in ('next', 'prev') else 'next'
+        return _decode(field, data['v']), int(data['id']), direction
+    except (ValueError, KeyError, TypeError, InvalidOperation):
+        return None
+
+
+def keyset_paginate(queryset, sort=None, cursor=None, page_size=PAGE_SIZE,
+                    sorts=PRODUCT_SORTS, default_sort=DEFAULT_SORT):
+    """
+    Cursor pagination on (sort field, id). Each page is a WHERE on the last
+    seen key plus LIMIT, so page 500 costs the same as page 1 (no OFFSET).
+    `sorts` maps sort keys to (field, descending), PRODUCT_SORTS by default.
+
+    Returns a dict with `items`, `next_cursor`, `prev_cursor` and the `sort`
+    actually applied.
+    """
+    if sort not in sorts:
+        sort = default_sort
+    field, descending = sorts[sort]
+    parsed = parse_cursor(cursor, field)
+
+    going_back = parsed is not None and parsed[2] == 'prev'
+    # Walking backwards = walking forwards over the reversed order
+    forward_desc = descending != going_back
+
+    if forward_desc:
+        ordering = [f'-{field}', '-id']
+    else:
+        ordering = [field, 'id']
+    qs = queryset.order_by(*ordering)
+
+    if parsed is not None:
+        value, last_id = parsed[0], parsed[1]
+        op = 'lt' if forward_desc else 'gt'
+        qs = qs.filter(
+            Q(**{f'{field}__{op}': value}) |
+            Q(**{field: value, f'id__{op}': last_id})
+        )
+
+    rows = list(qs[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if going_back:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if going_back:
+            next_cursor = make_cursor(rows[-1], field, 'next')
+            if has_more:
+                prev_cursor = make_cursor(rows[0], field, 'prev')
+        else:
+            if has_more:
+                next_cursor = make_cursor(rows[-1], field, 'next')
+            if parsed is not None:
+                prev_cursor = make_cursor(rows[0], field, 'prev')
+
+    return {
+        'items': rows,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'sort': sort,
+    }
+
+
+def cursor_url(request, cursor):
+    """Current URL's query string with `cursor` swapped in."""
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return '?' + params.urlencode()
+
+
+def paginate_products(request, queryset, default_sort=DEFAULT_SORT):
+    page = keyset_paginate(
+        queryset,
+        sort=request.GET.get('sort') or default_sort,
+        cursor=request.GET.get('cursor'),
+    )
+    page['next_url'] = cursor_url(request, page['next_cursor']) if page['next_cursor'] else None
+    page['prev_url'] = cursor_url(request, page['prev_cursor']) if page['prev_cursor'] else None
+    return page
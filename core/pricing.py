@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import HotDeal
+
+PRICING_CACHE_KEY = 'core:cart_pricing:{}:{}:{}'
+PRICE_VERSION_KEY = 'core:price_version'
+# upper bound even when no deal boundary is coming up
+PRICING_TIMEOUT = 60 * 15
+
+
+def get_price_version():
+    return cache.get_or_set(PRICE_VERSION_KEY, 1, None)
+
+
+def bump_price_version():
+    """Called when any product price or HotDeal changes; retires cached pricing."""
+    try:
+        cache.incr(PRICE_VERSION_KEY)
+    except ValueError:
+        cache.set(PRICE_VERSION_KEY, 1, None)
+
+
+def _empty():
+    return {'lines': {}, 'subtotal': 0.0, 'qty': 0, 'changed': [], 'unavailable': []}
+
+
+def _priced_items(cart, now):
+    """
+    Every line with its product, cover image, best running deal and the next
+    deal start / end, in a single SELECT.
+    """
+    deals = HotDeal.objects.filter(product=OuterRef('product_id'))
+    return (
+        cart.items
+        .select_related('product', 'product__cover_image')
+        .annotate(
+            deal_price=Subquery(
+                deals.filter(start_date__lte=now, end_date__gte=now)
+                .order_by('special_price').values('special_price')[:1]
+            ),
+            next_start=Subquery(
+                deals.filter(start_date__gt=now).order_by('start_date').values('start_date')[:1]
+            ),
+            next_end=Subquery(
+                deals.filter(end_date__gte=now).order_by('end_date').values('end_date')[:1]
+            ),
+        )
+        .order_by('id')
+    )
+
+
+def price_cart(cart, now=None, use_cache=True):
+    """
+    Re-price a cart from the live Product rows (discount_percent + any running
+    HotDeal), flagging lines whose price moved since the customer last saw it
+    and products that are no longer sold. One query, cached per cart version
+    until the next deal start / end among its products.
+
+    The price version lives in the default cache, which is per process unless
+    CACHES points at a shared backend, so checkout passes use_cache=False and
+    always prices from the database.
+
+    Lines keep the shape templates use: {"<product_id>": {"name", "price",
+    "qty", "image", "previous_price", "changed", "available"}}.
+    """
+    if cart is None:
+        return _empty()
+    now = now or timezone.now()
+    key = PRICING_CACHE_KEY.format(cart.pk, cart.version, get_price_version())
+    result = cache.get(key) if use_cache else None
+    if result is not None:
+        return result
+
+    result = _empty()
+    expires = now + timedelta(seconds=PRICING_TIMEOUT)
+    for item in _priced_items(cart, now):
+        product = item.product
+        price = product.price_with_deal(item.deal_price)
+        available = product.is_active
+        changed = item.unit_price is not None and item.unit_price != price
+
+        pid = str(item.product_id)
+        result['lines'][pid] = {
+            'name': product.name,
+            'price': float(price),
+            'qty': item.qty,
+            'image': product.cover_image.image if product.cover_image else None,
+            'previous_price': float(item.unit_price) if item.unit_price is not None else None,
+            'unit_price': price,
+            'changed': changed,
+            'available': available,
+        }
+        if not available:
+            result['unavailable'].append(pid)
+            continue
+        if changed:
+            result['changed'].append(pid)
+        result['subtotal'] += float(price) * item.qty
+        result['qty'] += item.qty
+
+        for boundary in (item.next_start, item.next_end):
+            if boundary is not None and boundary < expires:
+                expires = boundary
+
+    timeout = max(int((expires - now).total_seconds()), 1)
+    cache.set(key, result, timeout)
+    return result
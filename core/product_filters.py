@@ -0,0 +1,97 @@
+from urllib.parse import urlencode
+
+from django.db.models import Q
+
+from .models import Brand, Category, Product
+
+# ?sort= value -> (field, descending), for core.pagination.keyset_paginate
+ADMIN_PRODUCT_SORTS = {
+    '-updated_at': ('updated_at', True),
+    'updated_at': ('updated_at', False),
+    'name': ('name', False),
+    '-name': ('name', True),
+    'price': ('price', False),
+    '-price': ('price', True),
+    'stock_quantity': ('stock_quantity', False),
+    '-stock_quantity': ('stock_quantity', True),
+}
+DEFAULT_ADMIN_PRODUCT_SORT = '-updated_at'
+ADMIN_PRODUCT_PAGE_SIZE = 50
+
+# columns the list renders; everything else (descriptions, specs) stays unloaded
+ADMIN_PRODUCT_FIELDS = (
+    'id', 'name', 'price', 'discount_percent', 'stock_quantity', 'is_active', 'status',
+    'updated_at', 'category__name', 'brand__name', 'cover_image__image',
+)
+
+PRODUCT_STATUSES = {value for value, _ in Product.STATUS_CHOICES}
+
+
+def _parse_id(raw):
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_admin_product_filters(params):
+    """Filters for the admin product list: search, category subtree, brand, status, active."""
+    status = (params.get('status') or '').strip()
+    active = params.get('active') or ''
+    return {
+        'search': (params.get('search') or '').strip(),
+        'category': _parse_id(params.get('category')),
+        'brand': _parse_id(params.get('brand')),
+        'status': status if status in PRODUCT_STATUSES else '',
+        'active': active if active in ('1', '0') else '',
+    }
+
+
+def filter_admin_products(filters, queryset=None):
+    qs = Product.objects.all() if queryset is None else queryset
+
+    search = filters['search']
+    if search:
+        q = Q(name__istartswith=search)
+        if search.lstrip('#').isdigit():
+            q |= Q(pk=int(search.lstrip('#')))
+        qs = qs.filter(q)
+
+    if filters['category']:
+        path = Category.objects.filter(pk=filters['category']).values_list('path', flat=True).first()
+        if path is None:
+            return qs.none()
+        # whole subtree through the path range, joined in the same query
+        qs = qs.filter(**Category.subtree_filter(path, prefix='category__'))
+    if filters['brand']:
+        qs = qs.filter(brand_id=filters['brand'])
+    if filters['status']:
+        qs = qs.filter(status=filters['status'])
+    if filters['active']:
+        qs = qs.filter(is_active=filters['active'] == '1')
+    return qs
+
+
+def admin_product_rows(queryset):
+    return queryset.select_related('category', 'brand', 'cover_image').only(*ADMIN_PRODUCT_FIELDS)
+
+
+def filter_choices():
+    """Category options indented by depth (tree order via path), and brands."""
+    categories = list(Category.objects.only('id', 'name', 'path', 'depth').order_by('path'))
+    # path orders "1/10/" before "1/2/"; sort numerically on the id segments instead
+    categories.sort(key=lambda c: [int(i) for i in c.path.split('/') if i])
+    for c in categories:
+        c.label = '— ' * c.depth + c.name
+    brands = Brand.objects.only('id', 'name').order_by('name')
+    return categories, brands
+
+
+def sort_links(filters, current):
+    """Column -> URL that sorts by it (flipping direction if already sorted), filters kept."""
+    base = {k: v for k, v in filters.items() if v not in ('', None)}
+    links = {}
+    for column in ('name', 'price', 'stock_quantity', 'updated_at'):
+        sort = f'-{column}' if current == column else column
+        links[column] = '?' + urlencode({**base, 'sort': sort})
+    return links
@@ -0,0 +1,91 @@
+import re
+
+from django.db import connection
+
+# EXPLAIN QUERY PLAN details that mean "this will get slow as the table grows"
+# (\b stops the name from backtracking a character to dodge the lookahead)
+FULL_SCAN_RE = re.compile(r'^SCAN (\w+)\b(?! USING (?:COVERING )?INDEX)(?! USING INTEGER PRIMARY KEY)')
+TEMP_BTREE_RE = re.compile(r'USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT|RIGHT PART OF ORDER BY)')
+
+EQ_COLUMN_RE = r'"{table}"\."(\w+)" (?:= |IN \()'
+ORDER_COLUMN_RE = re.compile(r'ORDER BY (.+?)(?: LIMIT| OFFSET|$)')
+
+
+def explain(sql, params=()):
+    """Rows of EXPLAIN QUERY PLAN as a list of detail strings (SQLite only)."""
+    if connection.vendor != 'sqlite':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def suggest_index(sql, table):
+    """
+    Very small heuristic: equality / IN columns first, then ORDER BY columns
+    of the same table. Good enough to point at the right composite index.
+    """
+    eq_cols = []
+    for col in re.findall(EQ_COLUMN_RE.format(table=re.escape(table)), sql):
+        if col not in eq_cols:
+            eq_cols.append(col)
+
+    order_cols = []
+    match = ORDER_COLUMN_RE.search(sql)
+    if match:
+        for col in re.findall(rf'"{re.escape(table)}"\."(\w+)"', match.group(1)):
+            if col not in eq_cols and col not in order_cols:
+                order_cols.append(col)
+
+    cols = eq_cols + order_cols
+    return f'{table}({", ".join(cols)})' if cols else None
+
+
+def analyze_query(sql, params=()):
+    """
+    EXPLAIN one query. Returns a dict with the plan, problems found and an
+    index suggestion, or None for statements we don't analyze.
+    """
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    try:
+        plan = explain(sql, params)
+    except Exception:
+        return None
+
+    problems = []
+    suggestions = []
+    for detail in plan:
+        scan = FULL_SCAN_RE.match(detail)
+        if scan:
+            problems.append(detail)
+            suggestion = suggest_index(sql, scan.group(1))
+            if suggestion and suggestion not in suggestions:
+                suggestions.append(suggestion)
+        elif TEMP_BTREE_RE.search(detail):
+            problems.append(detail)
+
+    return {
+        'sql': sql,
+        'plan': plan,
+        'problems': problems,
+        'suggestions': suggestions,
+    }
+
+
+def analyze_queries(captured):
+    """`captured` is connection.queries style: [{'sql': ...}, ...] or (sql, params) pairs."""
+    reports = []
+    seen = set()
+    for item in captured:
+        if isinstance(item, dict):
+            sql, params = item['sql'], ()
+        else:
+            sql, params = item
+        if sql in seen:
+            continue
+        seen.add(sql)
+        report = analyze_query(sql, params)
+        if report and report['problems']:
+            reports.append(report)
+    return reports
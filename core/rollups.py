@@ -0,0 +1,141 @@
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Order, SalesRollup
+
+DIMENSIONS = ('district', 'upazila', 'delivery_method', 'payment_method', 'payment_status')
+MEASURES = ('subtotal', 'discount', 'delivery_charge', 'total', 'amount_paid')
+REBUILD_BATCH_SIZE = 1000
+
+
+def bucket_for(order):
+    key = {dim: getattr(order, dim) or '' for dim in DIMENSIONS}
+    key['day'] = timezone.localdate(order.created_at)
+    return key
+
+
+def record_order(order, sign=1):
+    """
+    Add (sign=1) or take back (sign=-1) one order in its bucket: an UPDATE
+    with F() increments, or an INSERT the first time the bucket is seen.
+    Call it inside the transaction that writes the order.
+    """
+    key = bucket_for(order)
+    amounts = {m: sign * (getattr(order, m) or 0) for m in MEASURES}
+    deltas = {m: F(m) + amounts[m] for m in MEASURES}
+    deltas['orders'] = F('orders') + sign
+
+    if SalesRollup.objects.filter(**key).update(**deltas):
+        return
+    try:
+        with transaction.atomic():
+            SalesRollup.objects.create(orders=sign, **key, **amounts)
+    except IntegrityError:
+        # another request created the bucket first
+        SalesRollup.objects.filter(**key).update(**deltas)
+
+
+def move_order(before, after):
+    """An order's payment fields changed: take the old state out, put the new one in."""
+    record_order(before, -1)
+    record_order(after, 1)
+
+
+def rebuild(since=None, progress=None):
+    """
+    Recompute rollups from Order (all days, or days >= `since`) with one
+    grouped query, inserted in batches. Returns the number of buckets written.
+    """
+    tz = timezone.get_current_timezone()
+    orders = Order.objects.all()
+    if since is not None:
+        orders = orders.filter(created_at__gte=datetime.combine(since, time.min, tzinfo=tz))
+
+    rows = (
+        orders.annotate(day=TruncDate('created_at', tzinfo=tz))
+        .values('day', *DIMENSIONS)
+        .annotate(n=Count('id'), **{f'sum_{m}': Sum(m) for m in MEASURES})
+        .order_by()
+    )
+
+    written = 0
+    with transaction.atomic():
+        stale = SalesRollup.objects.all()
+        if since is not None:
+            stale = stale.filter(day__gte=since)
+        stale.delete()
+
+        batch = []
+        for row in rows.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(SalesRollup(
+                day=row['day'],
+                orders=row['n'],
+                **{dim: row[dim] or '' for dim in DIMENSIONS},
+                **{m: row[f'sum_{m}'] or 0 for m in MEASURES},
+            ))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                SalesRollup.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+                if progress:
+                    progress(written)
+        SalesRollup.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+# ---------------- Reports ----------------
+
+def rollups_for(status='', date_from=None, date_to=None):
+    qs = SalesRollup.objects.all()
+    if status:
+        qs = qs.filter(payment_status=status)
+    if date_from:
+        qs = qs.filter(day__gte=date_from)
+    if date_to:
+        qs = qs.filter(day__lte=date_to)
+    return qs
+
+
+def totals(status='', date_from=None, date_to=None):
+    """{'count', 'revenue'} for a status / day range, from rollups."""
+    agg = rollups_for(status, date_from, date_to).aggregate(count=Sum('orders'), revenue=Sum('total'))
+    return {'count': agg['count'] or 0, 'revenue': agg['revenue'] or 0}
+
+
+def daily_series(days=30, today=None):
+    """One entry per day (oldest first, empty days included) for the last `days` days."""
+    today = today or timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    by_day = {
+        row['day']: row
+        for row in rollups_for(date_from=start, date_to=today)
+        .values('day').annotate(orders_sum=Sum('orders'), revenue=Sum('total')).order_by()
+    }
+    series = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        row = by_day.get(day, {})
+        series.append({'day': day, 'orders': row.get('orders_sum') or 0, 'revenue': row.get('revenue') or 0})
+
+    peak = max((s['revenue'] for s in series), default=0)
+    for s in series:
+        s['pct'] = round(100 * s['revenue'] / peak) if peak else 0
+    return series
+
+
+def breakdown(dimension, days=30, limit=10, today=None):
+    """Top `limit` values of one dimension by revenue over the last `days` days."""
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown rollup dimension {dimension!r}")
+    today = today or timezone.localdate()
+    return list(
+        rollups_for(date_from=today - timedelta(days=days - 1), date_to=today)
+        .values(label=F(dimension))
+        .annotate(orders_sum=Sum('orders'), revenue=Sum('total'))
+        .order_by('-revenue')[:limit]
+    )
@@ -0,0 +1,125 @@
+import re
+
+from django.db import connection
+from django.utils.html import strip_tags
+
+from .models import Product
+
+FTS_TABLE = 'core_product_fts'
+
+# bm25() column weights, same order as the FTS columns below
+BM25_WEIGHTS = (10.0, 4.0, 1.0, 1.0, 3.0, 2.0)
+
+CREATE_FTS_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    name, short_description, description, specifications, brand, category,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+INDEX_BATCH_SIZE = 500
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def _row_for(product):
+    return (
+        product.pk,
+        product.name or '',
+        strip_tags(product.short_description or ''),
+        strip_tags(product.description or ''),
+        strip_tags(product.specifications or ''),
+        product.brand.name if product.brand_id else '',
+        product.category.name if product.category_id else '',
+    )
+
+
+def index_products(product_ids):
+    """(Re)index the given products; inactive or missing ones are dropped."""
+    if not fts_available():
+        return
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+
+    with connection.cursor() as cursor:
+        for i in range(0, len(product_ids), INDEX_BATCH_SIZE):
+            chunk = product_ids[i:i + INDEX_BATCH_SIZE]
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in chunk]
+            )
+            products = (
+                Product.objects.filter(pk__in=chunk, is_active=True)
+                .select_related('brand', 'category')
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} "
+                f"(rowid, name, short_description, description, specifications, brand, category) "
+                f"VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                [_row_for(p) for p in products],
+            )
+
+
+def unindex_product(product_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+
+def rebuild_index(progress=None):
+    """Drop and repopulate the whole index. Returns number of indexed products."""
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        cursor.execute(CREATE_FTS_SQL)
+
+    ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True))
+    for i in range(0, len(ids), INDEX_BATCH_SIZE):
+        index_products(ids[i:i + INDEX_BATCH_SIZE])
+        if progress:
+            progress(min(i + INDEX_BATCH_SIZE, len(ids)), len(ids))
+    return len(ids)
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 MATCH expression: every word is quoted
+    (so user input can't inject FTS syntax) and prefix-matched, all ANDed.
+    """
+    words = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{w}"*' for w in words)
+
+
+def search_products(text, offset=0, limit=20):
+    """
+    BM25 ranked product search. Returns (products, total) where products keep
+    rank order.
+    """
+    match = build_match_query(text)
+    if not match:
+        return [], 0
+
+    if not fts_available():
+        # Non-SQLite deployments: no FTS5, fall back to a plain name lookup
+        qs = Product.objects.filter(is_active=True, name__icontains=text.strip())
+        return list(qs.order_by('name')[offset:offset + limit]), qs.count()
+
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+        )
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s OFFSET %s",
+            [match, limit, offset],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+
+    found = Product.objects.filter(pk__in=ids, is_active=True).select_related('cover_image').in_bulk()
+    return [found[pk] for pk in ids if pk in found], total
@@ -0,0 +1,124 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Category, Product, Brand, HotDeal, ProductImage, Order
+from .context_processors import invalidate_menu_cache
+from .deals import invalidate_active_deals
+from .brand_directory import invalidate_brand_directory
+from .dashboard import invalidate_dashboard_kpis
+from .images import schedule_variants
+from .cart import merge_carts
+from .pricing import bump_price_version
+from .rollups import record_order
+from .inventory import invalidate_available, record_stock_edit
+from . import search
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate_menu_cache()
+
+
+# ---------------- Search index ----------------
+
+@receiver(post_save, sender=Product)
+def product_saved_reindex(sender, instance, **kwargs):
+    search.index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted_unindex(sender, instance, **kwargs):
+    search.unindex_product(instance.pk)
+
+
+@receiver(post_save, sender=Brand)
+def brand_saved_reindex(sender, instance, created, **kwargs):
+    if not created:
+        search.index_products(instance.brand.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Category)
+def category_saved_reindex(sender, instance, created, **kwargs):
+    if not created:
+        search.index_products(instance.products.values_list('id', flat=True))
+
+
+# ---------------- Effective price ----------------
+
+@receiver(post_save, sender=HotDeal)
+@receiver(post_delete, sender=HotDeal)
+def hot_deal_changed(sender, instance, **kwargs):
+    Product.refresh_effective_prices([instance.product_id])
+    invalidate_active_deals()
+    bump_price_version()
+
+
+@receiver(post_save, sender=Product)
+def product_price_changed(sender, instance, **kwargs):
+    # price / discount / is_active may have moved: cached cart pricing is stale
+    bump_price_version()
+
+
+@receiver(post_save, sender=Product)
+def product_stock_changed(sender, instance, created, **kwargs):
+    record_stock_edit(instance, created)
+    invalidate_available([instance.pk])
+
+
+# ---------------- Brand directory ----------------
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def brand_directory_changed(sender, instance, **kwargs):
+    invalidate_brand_directory()
+
+
+# ---------------- Admin dashboard ----------------
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def dashboard_counts_changed(sender, instance, **kwargs):
+    invalidate_dashboard_kpis()
+
+
+# ---------------- Image variants ----------------
+
+@receiver(post_save, sender=ProductImage)
+def product_image_variants(sender, instance, **kwargs):
+    schedule_variants(instance.image)
+
+
+@receiver(post_save, sender=Brand)
+def brand_logo_variants(sender, instance, **kwargs):
+    schedule_variants(instance.logo)
+
+
+# ---------------- Cover image ----------------
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def product_image_changed(sender, instance, **kwargs):
+    # pk-only instance: no need to load the product just to update one column
+    Product(pk=instance.product_id).refresh_cover_image()
+
+
+# ---------------- Cart ----------------
+
+@receiver(user_logged_in)
+def merge_guest_cart(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, 'session'):
+        merge_carts(request, user)
+
+
+# ---------------- Sales rollups ----------------
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    record_order(instance, -1)
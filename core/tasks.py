@@ -0,0 +1,108 @@
+"""
+Jobs run by `manage.py run_jobs`. Request code only enqueues them by name
+(core.jobs.enqueue); PERIODIC_JOBS are scheduled by the worker itself.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .jobs import task
+from .models import Job, Order
+
+logger = logging.getLogger('core.jobs')
+
+# (cron expression, task name), evaluated in local time once a minute
+PERIODIC_JOBS = [
+    ('* * * * *', 'deals.tick'),
+    ('*/5 * * * *', 'inventory.release_expired'),
+    ('*/10 * * * *', 'cache.warm'),
+    ('0 2 * * *', 'rollups.rebuild_recent'),
+    ('0 3 * * *', 'carts.expire'),
+    ('30 3 * * *', 'inventory.snapshot'),
+    ('0 4 * * *', 'jobs.purge'),
+]
+
+
+# ---------------- Orders ----------------
+
+def _email_order(order, subject, template):
+    if not getattr(settings, 'ORDER_EMAILS', False) or not order.email:
+        return
+    body = render_to_string(template, {'order': order, 'items': order.items.all()})
+    send_mail(subject, body, None, [order.email])
+
+
+@task('orders.placed')
+def order_placed(order_id):
+    """Follow-up after checkout: order confirmation to the customer."""
+    order = Order.objects.filter(pk=order_id).first()
+    if order is None:
+        return
+    _email_order(order, f"Order #{order.id} received", 'order/email/confirmation.txt')
+    logger.info("order %s placed, follow-ups done", order_id)
+
+
+@task('orders.payment_updated')
+def order_payment_updated(order_id):
+    """Follow-up after staff record a payment: receipt to the customer."""
+    order = Order.objects.filter(pk=order_id).first()
+    if order is None:
+        return
+    _email_order(order, f"Payment update for order #{order.id}", 'order/email/payment.txt')
+    logger.info("order %s payment %s, follow-ups done", order_id, order.payment_status)
+
+
+# ---------------- Periodic ----------------
+
+@task('deals.tick', max_attempts=1, concurrency=1)
+def deals_tick():
+    # Reprice every product whose deal started or ended since the last tick,
+    # then rebuild the active-deals cache, so listings flip on time even when
+    # nobody is browsing and after a restart or cache eviction.
+    from .deals import get_active_deals, refresh_deal_prices
+    refresh_deal_prices()
+    get_active_deals()
+
+
+@task('inventory.release_expired', max_attempts=1, concurrency=1)
+def release_expired_holds():
+    from .inventory import release_expired
+    release_expired()
+
+
+@task('inventory.snapshot', concurrency=1)
+def snapshot_inventory():
+    from .inventory import take_snapshots
+    take_snapshots()
+
+
+@task('carts.expire', concurrency=1)
+def expire_carts():
+    from .cart import expire_carts
+    expire_carts()
+
+
+@task('cache.warm', max_attempts=1, concurrency=1)
+def warm_caches():
+    """Rebuild read-mostly caches. Only useful with a cache shared with the web processes."""
+    from .brand_directory import get_brand_directory
+    from .context_processors import get_menu_html
+    get_menu_html()
+    get_brand_directory()
+
+
+@task('rollups.rebuild_recent', concurrency=1)
+def rebuild_recent_rollups(days=2):
+    # nightly self-heal for the incremental updates (e.g. orders edited in the Django admin)
+    from .rollups import rebuild
+    rebuild(since=timezone.localdate() - timedelta(days=days - 1))
+
+
+@task('jobs.purge', concurrency=1)
+def purge_jobs(days=7):
+    cutoff = timezone.now() - timedelta(days=days)
+    Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
@@ -0,0 +1,24 @@
+from django import template
+
+from core.images import VARIANTS, variant_url as _variant_url
+
+register = template.Library()
+
+
+@register.filter
+def variant_url(fieldfile, size):
+    """{{ img.image|variant_url:'card' }} -> resized WebP URL (rendered on first request)."""
+    if not fieldfile or not getattr(fieldfile, 'name', None) or size not in VARIANTS:
+        return ''
+    return _variant_url(fieldfile.name, size)
+
+
+@register.filter
+def variant_srcset(fieldfile):
+    """{{ img.image|variant_srcset }} -> "url 150w, url 400w, url 1200w" """
+    if not fieldfile or not getattr(fieldfile, 'name', None):
+        return ''
+    return ', '.join(
+        f'{_variant_url(fieldfile.name, size)} {box[0]}w'
+        for size, box in VARIANTS.items()
+    )
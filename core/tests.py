@@ -1,3 +1,703 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from . import dashboard
+from .cart import CART_SESSION_KEY, clear_ordered_items
+from .catalog_import import CatalogImporter, RowError, load_state, parse_row, save_state
+from .deals import DEAL_SWEEP_CACHE_KEY, get_active_deals, refresh_deal_prices
+from .facets import apply_product_filters, compute_facets, parse_product_filters
+from .images import render_variants, variant_path, variant_url
+from .inventory import (
+    available_stock, ledger_stock, move_stock, reconcile_stock, release_expired, reserve, take_snapshots,
+)
+from .models import (
+    Brand, Cart, CartItem, Category, HotDeal, InventoryMovement, InventorySnapshot, Job, Order, Product,
+    ProductImage,
+)
+from .orders import OutOfStock, place_order
+from .pagination import keyset_paginate, parse_cursor
+from .product_filters import (
+    ADMIN_PRODUCT_SORTS, filter_admin_products, parse_admin_product_filters, sort_links,
+)
+from .pricing import price_cart
+from .query_plans import FULL_SCAN_RE
+from .search import build_match_query, search_products
+
+
+class MergeCartsOnLoginTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(category=category, name='Phone', price=Decimal('100.00'))
+        self.case = Product.objects.create(category=category, name='Case', price=Decimal('15.50'))
+        self.user = get_user_model().objects.create_user(username='buyer', password='secret-pass')
+
+    def test_login_merges_guest_cart_into_user_cart(self):
+        user_cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=user_cart, product=self.phone, qty=1)
+        guest = Cart.objects.create()
+        CartItem.objects.create(cart=guest, product=self.phone, qty=2)
+        CartItem.objects.create(cart=guest, product=self.case, qty=1)
+
+        session = self.client.session
+        session[CART_SESSION_KEY] = guest.pk
+        session.save()
+
+        response = self.client.post('/login/', {'username': 'buyer', 'password': 'secret-pass'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Cart.objects.filter(pk=guest.pk).exists())
+        user_cart.refresh_from_db()
+        self.assertEqual(user_cart.total_qty, 4)
+        self.assertEqual(user_cart.total_amount, Decimal('315.50'))
+        self.assertEqual(self.client.session[CART_SESSION_KEY], user_cart.pk)
+
+
+class FullScanPatternTests(SimpleTestCase):
+    def test_plain_scan_is_a_full_scan(self):
+        match = FULL_SCAN_RE.match('SCAN core_product')
+        self.assertEqual(match.group(1), 'core_product')
+
+    def test_index_scans_are_not_full_scans(self):
+        for detail in (
+            'SCAN core_product USING INDEX core_prod_created_id_idx',
+            'SCAN core_product USING COVERING INDEX core_prod_active_stock_idx',
+            'SCAN core_order USING INTEGER PRIMARY KEY',
+        ):
+            with self.subTest(detail=detail):
+                self.assertIsNone(FULL_SCAN_RE.match(detail))
+
+
+class ImageVariantTests(SimpleTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/')
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(self.media_root, 'products'))
+
+    def test_non_image_is_a_404_and_leaves_no_variant(self):
+        with open(os.path.join(self.media_root, 'products', 'notes.jpg'), 'w') as f:
+            f.write('not an image')
+
+        response = self.client.get('/img/thumb/products/notes.jpg')
+
+        self.assertEqual(response.status_code, 404)
+        dest = variant_path('products/notes.jpg', 'thumb')
+        self.assertFalse(os.path.exists(dest))
+        self.assertEqual(self.leftovers(dest), [])
+
+    def leftovers(self, dest):
+        dest_dir = os.path.dirname(dest)
+        return [n for n in os.listdir(dest_dir) if n != os.path.basename(dest)] if os.path.isdir(dest_dir) else []
+
+    def source_image(self):
+        src = os.path.join(self.media_root, 'products', 'a.png')
+        Image.new('RGB', (40, 30), 'red').save(src)
+        return src
+
+    def test_render_replaces_the_variant_without_temp_files(self):
+        src = self.source_image()
+        dest = variant_path('products/a.png', 'thumb')
+
+        self.assertEqual(render_variants(src, [(dest, (20, 20))]), 1)
+        self.assertEqual(render_variants(src, [(dest, (20, 20))]), 1)
+
+        self.assertTrue(os.path.exists(dest))
+        self.assertEqual(self.leftovers(dest), [])
+
+    def test_losing_the_race_to_another_worker_is_not_an_error(self):
+        src = self.source_image()
+        dest = variant_path('products/a.png', 'thumb')
+        os.makedirs(os.path.dirname(dest))
+        open(dest, 'wb').close()
+
+        with mock.patch('core.images.os.replace', side_effect=OSError('busy')):
+            self.assertEqual(render_variants(src, [(dest, (20, 20))]), 0)
+        self.assertEqual(self.leftovers(dest), [])
+
+    def test_url_points_at_media_once_the_variant_exists(self):
+        self.assertEqual(variant_url('products/a.jpg', 'thumb'), '/img/thumb/products/a.jpg')
+
+        dest = variant_path('products/a.jpg', 'thumb')
+        os.makedirs(os.path.dirname(dest))
+        open(dest, 'wb').close()
+
+        self.assertEqual(variant_url('products/a.jpg', 'thumb'), '/media/variants/thumb/products/a.jpg.webp')
+
+
+class PlaceOrderJobTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(
+            category=category, name='Phone', price=Decimal('100.00'), stock_quantity=1
+        )
+        self.order_fields = dict(
+            first_name='Alice', last_name='Rahman', address='Road 1', mobile='01711111111',
+            email='alice@example.com', upazila='Mirpur', district='Dhaka',
+            delivery_method='home', payment_method='cod', subtotal=100, total=100,
+        )
+
+    def lines(self, qty):
+        return {str(self.phone.pk): {'name': 'Phone', 'price': 100.0, 'qty': qty}}
+
+    def test_follow_up_job_is_queued_with_the_order(self):
+        order = place_order(self.lines(1), **self.order_fields)
+        job = Job.objects.get(name='orders.placed')
+        self.assertEqual(job.payload, {'order_id': order.pk})
+
+    def test_no_job_when_the_order_rolls_back(self):
+        with self.assertRaises(OutOfStock):
+            place_order(self.lines(2), **self.order_fields)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Job.objects.exists())
+
+
+class PriceFacetTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Phones')
+        for price in ('100.00', '450.00', '700.00', '20000.00'):
+            Product.objects.create(category=category, name=f'Phone {price}', price=Decimal(price))
+        self.products = Product.objects.filter(category=category)
+
+    def facets(self, query=''):
+        filters = parse_product_filters(RequestFactory().get('/', dict(p.split('=') for p in query.split('&') if p)))
+        return filters, compute_facets(self.products, filters)
+
+    def test_bucket_counts(self):
+        _, facets = self.facets()
+        self.assertEqual([b['count'] for b in facets['price_buckets']], [2, 1, 0, 0, 1, 0])
+        self.assertEqual(facets['total'], 4)
+
+    def test_selected_bucket_filters_everything_but_its_own_counts(self):
+        filters, facets = self.facets('price_range=0')
+        self.assertEqual([b['count'] for b in facets['price_buckets']], [2, 1, 0, 0, 1, 0])
+        self.assertTrue(facets['price_buckets'][0]['selected'])
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(apply_product_filters(self.products, filters).count(), 2)
+
+
+class SearchPriceTests(TestCase):
+    def test_search_shows_the_hot_deal_price(self):
+        category = Category.objects.create(name='Phones')
+        phone = Product.objects.create(category=category, name='Galaxy Phone', price=Decimal('100.00'))
+        now = timezone.now()
+        HotDeal.objects.create(
+            product=phone, start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1),
+            special_price=Decimal('80.00'),
+        )
+
+        api = self.client.get('/api/search/', {'q': 'Galaxy'}).json()
+        self.assertEqual(api['results'][0]['price'], 80.0)
+
+        page = self.client.get('/search/', {'q': 'Galaxy'})
+        self.assertContains(page, '৳80.00')
+
+    def test_home_and_quickview_show_the_hot_deal_price(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        category = Category.objects.create(name='Phones')
+        phone = Product.objects.create(
+            category=category, name='Galaxy Phone', price=Decimal('100.00'), old_price=Decimal('120.00')
+        )
+        now = timezone.now()
+        HotDeal.objects.create(
+            product=phone, start_date=now - timedelta(hours=1), end_date=now + timedelta(hours=1),
+            special_price=Decimal('80.00'),
+        )
+
+        home = self.client.get('/')
+        self.assertContains(home, '<span class="price-new">80.00৳</span>', html=True)
+        self.assertContains(home, 'Save: 40.00৳')
+
+        quickview = self.client.get(f'/product/quickview/{phone.pk}/')
+        self.assertContains(quickview, '<span class="price-new">80.00৳</span>', html=True)
+
+
+class DealPriceSweepTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        category = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(category=category, name='Phone', price=Decimal('100.00'))
+        self.now = timezone.now()
+        HotDeal.objects.create(
+            product=self.phone, start_date=self.now + timedelta(minutes=5),
+            end_date=self.now + timedelta(hours=1), special_price=Decimal('80.00'),
+        )
+
+    def effective_price(self):
+        return Product.objects.values_list('effective_price', flat=True).get(pk=self.phone.pk)
+
+    def test_deal_starting_between_sweeps_is_repriced(self):
+        refresh_deal_prices(now=self.now)
+        self.assertEqual(self.effective_price(), Decimal('100.00'))
+
+        self.assertEqual(refresh_deal_prices(now=self.now + timedelta(minutes=6)), 1)
+        self.assertEqual(self.effective_price(), Decimal('80.00'))
+
+    def test_cached_deals_reprice_when_a_boundary_passes(self):
+        self.assertEqual(get_active_deals(now=self.now), [])
+
+        deals = get_active_deals(now=self.now + timedelta(minutes=6))
+
+        self.assertEqual([d.product_id for d in deals], [self.phone.pk])
+        self.assertEqual(deals[0].product.effective_price, Decimal('80.00'))
+        self.assertEqual(self.effective_price(), Decimal('80.00'))
+
+        self.assertEqual(get_active_deals(now=self.now + timedelta(hours=2)), [])
+        self.assertEqual(self.effective_price(), Decimal('100.00'))
+
+    def test_first_sweep_checks_every_deal(self):
+        # the boundary passed with nothing cached and no sweep on record
+        cache.delete(DEAL_SWEEP_CACHE_KEY)
+        refresh_deal_prices(now=self.now + timedelta(minutes=6))
+        self.assertEqual(self.effective_price(), Decimal('80.00'))
+
+
+class AddToCartQtyTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(
+            category=category, name='Phone', price=Decimal('100.00'), stock_quantity=10
+        )
+
+    def test_bad_qty_is_a_400(self):
+        for qty in ('abc', '-5', '0'):
+            with self.subTest(qty=qty):
+                response = self.client.get(f'/add-to-cart/{self.phone.pk}/', {'qty': qty})
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_batch_rejects_bad_qty(self):
+        for qty in ('abc', -5, 0):
+            with self.subTest(qty=qty):
+                response = self.client.post(
+                    '/add-to-cart/batch/',
+                    json.dumps({'items': [{'product_id': self.phone.pk, 'qty': qty}]}),
+                    content_type='application/json',
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_valid_qty_is_added(self):
+        response = self.client.get(f'/add-to-cart/{self.phone.pk}/', {'qty': '2'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['cart_qty'], 2)
+
+
+class CheckoutPricingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        category = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(category=category, name='Phone', price=Decimal('100.00'))
+        self.cart = Cart.objects.create()
+        CartItem.objects.create(cart=self.cart, product=self.phone, qty=1)
+
+    def test_uncached_pricing_ignores_a_stale_entry(self):
+        self.assertEqual(price_cart(self.cart)['subtotal'], 100.0)
+        # another worker's price change: this process's price version never moved
+        Product.objects.filter(pk=self.phone.pk).update(price=Decimal('120.00'))
+
+        self.assertEqual(price_cart(self.cart)['subtotal'], 100.0)
+        self.assertEqual(price_cart(self.cart, use_cache=False)['subtotal'], 120.0)
+
+
+class ClearOrderedItemsTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(category=category, name='Phone', price=Decimal('100.00'))
+        self.case = Product.objects.create(category=category, name='Case', price=Decimal('15.50'))
+        self.cart = Cart.objects.create()
+        self.request = RequestFactory().get('/')
+        self.request.user = AnonymousUser()
+        self.request.session = {CART_SESSION_KEY: self.cart.pk}
+
+    def test_only_the_ordered_quantity_leaves_the_cart(self):
+        # the phone was topped up to 3 in another tab after checkout priced 2
+        CartItem.objects.create(cart=self.cart, product=self.phone, qty=3)
+        CartItem.objects.create(cart=self.cart, product=self.case, qty=1)
+
+        clear_ordered_items(self.request, {self.phone.pk: 2, self.case.pk: 1})
+
+        self.assertEqual(list(self.cart.items.values_list('product_id', 'qty')), [(self.phone.pk, 1)])
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_qty, 1)
+        self.assertEqual(self.cart.total_amount, Decimal('100.00'))
+
+    def test_empty_cart_is_dropped(self):
+        CartItem.objects.create(cart=self.cart, product=self.phone, qty=2)
+
+        clear_ordered_items(self.request, {self.phone.pk: 2})
+
+        self.assertFalse(Cart.objects.filter(pk=self.cart.pk).exists())
+        self.assertNotIn(CART_SESSION_KEY, self.request.session)
+
+
+class CatalogImportResumeTests(TestCase):
+    def setUp(self):
+        work = tempfile.TemporaryDirectory()
+        self.addCleanup(work.cleanup)
+        self.path = os.path.join(work.name, 'catalog.csv')
+        with open(self.path, 'w') as f:
+            f.write('name,category,price,brand\n')
+            for n in range(1, 6):
+                f.write(f'Phone {n},Electronics > Phones,{n}00,Acme\n')
+
+    def run_import(self, *args):
+        call_command('import_catalog', self.path, '--batch-size', '2', *args, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_resume_continues_after_the_last_saved_row(self):
+        save_state(f'{self.path}.import-state', 4)
+        self.run_import()
+        self.assertEqual(list(Product.objects.values_list('name', flat=True)), ['Phone 5'])
+        self.assertTrue(load_state(f'{self.path}.import-state')['complete'])
+
+    def test_batch_committed_before_a_crash_is_not_duplicated(self):
+        # the first batch commits, then the process dies before recording it
+        with mock.patch('core.management.commands.import_catalog.save_state', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_import()
+        self.assertEqual(Product.objects.count(), 2)
+
+        self.run_import()
+
+        self.assertEqual(
+            sorted(Product.objects.values_list('name', flat=True)), [f'Phone {n}' for n in range(1, 6)]
+        )
+        self.assertEqual(Category.objects.filter(name='Phones').count(), 1)
+
+    def test_failed_batch_forgets_the_categories_it_created(self):
+        importer = CatalogImporter(os.path.dirname(self.path))
+        row = parse_row({'name': 'Phone', 'category': 'Electronics > Phones', 'price': '100'})
+        with mock.patch.object(Product.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                importer.import_batch([dict(row)])
+        self.assertFalse(Category.objects.exists())
+
+        self.assertEqual(importer.import_batch([dict(row)]), 1)
+        self.assertEqual(Product.objects.get().category.get_ancestors()[0].name, 'Electronics')
+
+    def test_zero_price_is_accepted_but_negative_is_not(self):
+        self.assertEqual(parse_row({'name': 'Gift', 'category': 'Misc', 'price': '0'})['fields']['price'], Decimal('0.00'))
+        with self.assertRaisesMessage(RowError, "price can't be negative"):
+            parse_row({'name': 'Gift', 'category': 'Misc', 'price': '-1'})
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Phones')
+        self.brand = Brand.objects.create(name='Acme')
+        self.phone = Product.objects.create(category=self.category, brand=self.brand, name='Galaxy Phone', price=100)
+        self.case = Product.objects.create(
+            category=self.category, name='Slim Case', price=10, description='<p>Fits the Galaxy phone</p>',
+        )
+
+    def names(self, text):
+        products, _ = search_products(text)
+        return [p.name for p in products]
+
+    def test_match_query_quotes_every_word(self):
+        self.assertEqual(build_match_query('gal* OR "x" -y'), '"gal"* "OR"* "x"* "y"*')
+        self.assertEqual(build_match_query('  '), '')
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.names('galax'), ['Galaxy Phone', 'Slim Case'])
+        self.assertEqual(search_products('galaxy')[1], 2)
+
+    def test_index_follows_product_and_brand_changes(self):
+        self.case.is_active = False
+        self.case.save()
+        self.assertEqual(self.names('galaxy'), ['Galaxy Phone'])
+
+        self.brand.name = 'Zenith'
+        self.brand.save()
+        self.assertEqual(self.names('zenith'), ['Galaxy Phone'])
+        self.assertEqual(self.names('acme'), [])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Phones')
+        # repeated prices: pages must break ties on id without skipping rows
+        for n, price in enumerate(['10.00', '20.00', '20.00', '20.00', '30.00', '40.00', '40.00']):
+            Product.objects.create(category=category, name=f'Phone {n}', price=Decimal(price))
+        self.products = Product.objects.all()
+        self.expected = list(self.products.order_by('effective_price', 'id').values_list('id', flat=True))
+
+    def ids(self, page):
+        return [p.pk for p in page['items']]
+
+    def test_walking_forward_visits_every_product_once(self):
+        seen, cursor = [], None
+        while True:
+            page = keyset_paginate(self.products, sort='price_low', cursor=cursor, page_size=3)
+            seen += self.ids(page)
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+
+    def test_prev_cursor_returns_the_previous_page(self):
+        first = keyset_paginate(self.products, sort='price_low', page_size=3)
+        second = keyset_paginate(self.products, sort='price_low', cursor=first['next_cursor'], page_size=3)
+        back = keyset_paginate(self.products, sort='price_low', cursor=second['prev_cursor'], page_size=3)
+
+        self.assertEqual(self.ids(second), self.expected[3:6])
+        self.assertEqual(self.ids(back), self.ids(first))
+        self.assertIsNone(back['prev_cursor'])
+
+    def test_cursor_round_trip_and_tampering(self):
+        page = keyset_paginate(self.products, sort='price_low', page_size=3)
+        last = page['items'][-1]
+        self.assertEqual(
+            parse_cursor(page['next_cursor'], 'effective_price'), (last.effective_price, last.pk, 'next')
+        )
+        self.assertIsNone(parse_cursor('not-a-cursor', 'effective_price'))
+        fallback = keyset_paginate(self.products, sort='price_low', cursor='garbage', page_size=3)
+        self.assertEqual(self.ids(fallback), self.expected[:3])
+
+
+class CoverImageTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(category=category, name='Phone', price=Decimal('100.00'))
+
+    def cover(self):
+        return Product.objects.values_list('cover_image', flat=True).get(pk=self.phone.pk)
+
+    def test_cover_follows_image_changes(self):
+        self.assertIsNone(self.cover())
+        second = ProductImage.objects.create(product=self.phone, image='products/b.jpg', sort_order=2)
+        first = ProductImage.objects.create(product=self.phone, image='products/a.jpg', sort_order=1)
+        self.assertEqual(self.cover(), first.pk)
+
+        banner = ProductImage.objects.create(product=self.phone, image='products/c.jpg', sort_order=3, is_banner=True)
+        self.assertEqual(self.cover(), banner.pk)
+
+        banner.delete()
+        first.delete()
+        self.assertEqual(self.cover(), second.pk)
+
+    def test_backfill_repairs_stale_covers(self):
+        image = ProductImage.objects.create(product=self.phone, image='products/a.jpg')
+        Product.objects.filter(pk=self.phone.pk).update(cover_image=None)
+
+        call_command('backfill_cover_images', stdout=io.StringIO())
+
+        self.assertEqual(self.cover(), image.pk)
+
+
+class CheckoutTokenTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(
+            category=category, name='Phone', price=Decimal('100.00'), stock_quantity=5
+        )
+        cart = Cart.objects.create()
+        CartItem.objects.create(cart=cart, product=self.phone, qty=1)
+        session = self.client.session
+        session[CART_SESSION_KEY] = cart.pk
+        session.save()
+        self.form = {
+            'checkout_token': 'a' * 32, 'phone': '01711111111', 'first_name': 'Alice', 'last_name': 'Rahman',
+            'address': 'Road 1', 'upazila': 'Mirpur', 'district': 'Dhaka', 'email': 'alice@example.com',
+            'payment_method': 'cod', 'delivery_method': 'home', 'delivery_charge': '60', 'coupon_discount': '0',
+        }
+
+    def test_replayed_submission_places_one_order(self):
+        first = self.client.post('/checkout/', self.form)
+        replay = self.client.post('/checkout/', self.form)
+
+        self.assertRedirects(first, '/success/', fetch_redirect_response=False)
+        self.assertRedirects(replay, '/success/', fetch_redirect_response=False)
+        order = Order.objects.get()
+        self.assertEqual(order.checkout_token, 'a' * 32)
+        self.assertEqual(order.items.get().qty, 1)
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock_quantity, 4)
+
+    def test_checkout_page_issues_a_fresh_token(self):
+        first = self.client.get('/checkout/').context['checkout_token']
+        second = self.client.get('/checkout/').context['checkout_token']
+        self.assertNotEqual(first, second)
+
+
+class ReservationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        category = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(
+            category=category, name='Phone', price=Decimal('100.00'), stock_quantity=3
+        )
+        self.other_cart = Cart.objects.create()
+
+    def test_holds_count_against_other_carts(self):
+        self.assertEqual(reserve(self.other_cart, {self.phone.pk: 2}), {})
+
+        response = self.client.get(f'/add-to-cart/{self.phone.pk}/', {'qty': '2'})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['message'], 'Only 1 left in stock.')
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(available_stock([self.phone.pk]), {self.phone.pk: 1})
+
+    def test_batch_shortfall_is_a_409_with_what_is_left(self):
+        reserve(self.other_cart, {self.phone.pk: 2})
+
+        response = self.client.post(
+            '/add-to-cart/batch/',
+            json.dumps({'items': [{'product_id': self.phone.pk, 'qty': 2}]}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['available'], {str(self.phone.pk): 1})
+
+    def test_expired_holds_free_the_stock(self):
+        past = timezone.now() - timedelta(hours=1)
+        reserve(self.other_cart, {self.phone.pk: 3}, now=past)
+
+        response = self.client.get(f'/add-to-cart/{self.phone.pk}/', {'qty': '3'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(release_expired(), 1)
+
+
+class InventoryLedgerTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(
+            category=category, name='Phone', price=Decimal('100.00'), stock_quantity=5
+        )
+
+    def test_ledger_follows_saves_and_movements(self):
+        self.phone.stock_quantity = 8
+        self.phone.save()
+        move_stock(self.phone.pk, -2, InventoryMovement.SALE)
+
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.stock_quantity, 6)
+        self.assertEqual(ledger_stock([self.phone.pk]), {self.phone.pk: 6})
+
+    def test_snapshot_folds_the_tail_and_prunes_it(self):
+        move_stock(self.phone.pk, 2, InventoryMovement.RESTOCK)
+        take_snapshots(prune_before=timezone.now() + timedelta(seconds=1))
+
+        self.assertEqual(InventorySnapshot.objects.get(product=self.phone).quantity, 7)
+        self.assertFalse(InventoryMovement.objects.exists())
+        self.assertEqual(ledger_stock([self.phone.pk]), {self.phone.pk: 7})
+
+    def test_reconcile_resets_a_drifted_counter(self):
+        # a write that bypassed the ledger
+        Product.objects.filter(pk=self.phone.pk).update(stock_quantity=50)
+
+        self.assertEqual(list(reconcile_stock(dry_run=True)), [(self.phone.pk, 50, 5)])
+        self.assertEqual(Product.objects.get(pk=self.phone.pk).stock_quantity, 50)
+
+        self.assertEqual(list(reconcile_stock()), [(self.phone.pk, 50, 5)])
+        self.assertEqual(Product.objects.get(pk=self.phone.pk).stock_quantity, 5)
+        self.assertEqual(list(reconcile_stock()), [])
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        category = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(
+            category=category, name='Phone', price=Decimal('100.00'), stock_quantity=2
+        )
+        Product.objects.create(category=category, name='Case', price=Decimal('10.00'), stock_quantity=50)
+
+    def test_kpis_are_cached_until_the_catalog_changes(self):
+        kpis = dashboard.get_kpis()
+        self.assertEqual((kpis['products'], kpis['low_stock'], kpis['out_of_stock']), (2, 1, 0))
+
+        # cached: only today's sales are read
+        with self.assertNumQueries(1):
+            dashboard.get_kpis()
+
+        self.phone.stock_quantity = 0
+        self.phone.save()
+        self.assertEqual(dashboard.get_kpis()['out_of_stock'], 1)
+
+    def test_todays_sales_come_from_the_rollups(self):
+        place_order(
+            {str(self.phone.pk): {'name': 'Phone', 'price': 100.0, 'qty': 1}},
+            first_name='Alice', last_name='Rahman', address='Road 1', mobile='01711111111',
+            email='alice@example.com', upazila='Mirpur', district='Dhaka',
+            delivery_method='home', payment_method='cod', subtotal=100, total=100,
+        )
+        kpis = dashboard.get_kpis()
+        self.assertEqual((kpis['orders_today'], kpis['revenue_today']), (1, 100))
+
+    def test_dashboard_renders_for_superusers(self):
+        admin = get_user_model().objects.create_superuser(username='admin', password='secret-pass')
+        self.client.force_login(admin)
+        response = self.client.get('/my-admin/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['kpis']['products'], 2)
+
+
+class AdminProductListTests(TestCase):
+    def setUp(self):
+        electronics = Category.objects.create(name='Electronics')
+        phones = Category.objects.create(name='Phones', parent=electronics)
+        books = Category.objects.create(name='Books')
+        acme = Brand.objects.create(name='Acme')
+        self.electronics = electronics
+        self.acme = acme
+        self.galaxy = Product.objects.create(category=phones, brand=acme, name='Galaxy', price=100, stock_quantity=3)
+        self.gadget = Product.objects.create(category=electronics, name='Gadget', price=50, is_active=False)
+        self.novel = Product.objects.create(category=books, name='Novel', price=10, stock_quantity=3)
+
+    def names(self, **params):
+        return sorted(filter_admin_products(parse_admin_product_filters(params)).values_list('name', flat=True))
+
+    def test_filters(self):
+        self.assertEqual(self.names(search='ga'), ['Gadget', 'Galaxy'])
+        self.assertEqual(self.names(search=f'#{self.novel.pk}'), ['Novel'])
+        self.assertEqual(self.names(category=str(self.electronics.pk)), ['Gadget', 'Galaxy'])
+        self.assertEqual(self.names(brand=str(self.acme.pk)), ['Galaxy'])
+        self.assertEqual(self.names(active='0'), ['Gadget'])
+        # junk values are ignored rather than erroring
+        self.assertEqual(self.names(category='x', active='maybe', status='nope'), ['Gadget', 'Galaxy', 'Novel'])
+
+    def test_stock_sort_pages_through_ties_with_cursors(self):
+        seen, cursor = [], None
+        while True:
+            page = keyset_paginate(
+                Product.objects.all(), sort='-stock_quantity', cursor=cursor, page_size=1, sorts=ADMIN_PRODUCT_SORTS,
+            )
+            seen += [p.pk for p in page['items']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [self.novel.pk, self.galaxy.pk, self.gadget.pk])
+
+    def test_sort_links_flip_the_current_column_and_keep_filters(self):
+        links = sort_links({'search': 'ga', 'category': None, 'active': ''}, 'name')
+        self.assertEqual(links['name'], '?search=ga&sort=-name')
+        self.assertEqual(links['price'], '?search=ga&sort=price')
+
+    def test_list_view_renders_a_page(self):
+        response = self.client.get('/products/', {'sort': 'name', 'active': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.name for p in response.context['products']], ['Galaxy', 'Novel'])
@@ -8,6 +8,9 @@ urlpatterns = [
     path('product/quickview/<int:pk>/', views.product_quickview, name='product_quickview'),
     path('product/<int:pk>/', views.product_detail, name='product_detail'),
     path('product/<slug:slug>/', views.product_detail, name='product_detail'),
+    path('search/', views.search, name='search'),
+    path('api/search/', views.search_api, name='search_api'),
+    path('img/<str:size>/<path:name>', views.image_variant, name='image_variant'),
 
     path('products/add/', views.product_create, name='product_add'),
     path('products/', views.product_list, name='product_list'),
@@ -36,6 +39,8 @@ urlpatterns = [
 
 
     path('add-to-cart/<int:product_id>/', views.add_to_cart, name='add_to_cart'),
+    path('add-to-cart/batch/', views.add_to_cart_batch, name='add_to_cart_batch'),
+    path('cart/summary/', views.cart_summary_api, name='cart_summary'),
     path('cart/', views.cart_view, name='cart_view'),
     path('remove/<int:product_id>/', views.remove_from_cart, name='remove_from_cart'),
     path("apply-coupon/", views.apply_coupon, name="apply_coupon"),
@@ -1,22 +1,38 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth import login
-from django.utils import timezone
+from django.db import IntegrityError
+from django.views.decorators.http import require_POST
 from .models import *
+from .pagination import paginate_products
+from .deals import get_active_deals
+from .cart import (
+    get_cart, get_summary, line_qty, add_item, add_items, change_qty, remove_item,
+    clear_ordered_items, acknowledge_prices,
+)
+from .pricing import price_cart
+from .orders import place_order, OutOfStock
+from .inventory import reserve, release, attach_available_stock
+from . import dashboard, rollups
 from accounts.forms import GuestCheckoutForm
 from accounts.utils import generate_username_from_phone, generate_unique_username
+import json
 import re
+import uuid
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
 def home(request):
-    products = Product.objects.filter(is_active=True).order_by('-created_at')
+    page = paginate_products(
+        request, Product.objects.filter(is_active=True).select_related('cover_image')
+    )
+    products = page['items']
     brands = Brand.objects.filter(is_active=True)
-    now = timezone.now()
-    deals = HotDeal.objects.filter(start_date__lte=now, end_date__gte=now)
+    deals = get_active_deals()
 
     context = {
         'products': products,
+        'page': page,
         'deals': deals,
         'brands': brands
     }
@@ -25,75 +41,47 @@ def home(request):
 
 # --- Updated Category View ---
 def get_all_subcategories(category):
-    """Recursively get all child subcategories of a category"""
-    subcategories = []
-    for child in category.children.all():
-        subcategories.append(child)
-        subcategories += get_all_subcategories(child)
-    return subcategories
+    """All descendant subcategories of a category (single query via Category.path)"""
+    return list(category.get_descendants())
 
 
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Max, Q
 from .models import Product, Category
 from .models import Brand   
+from .facets import parse_product_filters, apply_product_filters, compute_facets
 
 def category_products(request, slug):
     category = get_object_or_404(Category, slug=slug)
 
-    subcats = get_all_subcategories(category)
-    all_category_ids = [category.id] + [c.id for c in subcats]
+    all_category_ids = category.get_descendant_ids(include_self=True)
+    breadcrumbs = category.get_ancestors()
 
-    products = Product.objects.filter(
+    base_products = Product.objects.filter(
         category_id__in=all_category_ids,
         is_active=True
     )
 
-    # GET values
-    selected_status = request.GET.getlist('status')
-    selected_brands = request.GET.getlist('brand')
-    selected_rating = request.GET.get('rating')
-    selected_featured = request.GET.get('featured')
-    selected_max_price = request.GET.get('max_price')
-    in_stock = request.GET.get('in_stock')
-
-    # Filters
-    if selected_max_price:
-        products = products.filter(price__lte=selected_max_price)
-
-    if in_stock:
-        products = products.filter(stock_quantity__gt=0)
-
-    if selected_status:
-        products = products.filter(status__in=selected_status)
-
-    if selected_brands:
-        products = products.filter(brand_id__in=selected_brands)
-
-    if selected_rating:
-        products = products.filter(rating__gte=selected_rating)
-
-    if selected_featured:
-        products = products.filter(is_featured=True)
-
-    max_price = products.aggregate(Max('price'))['price__max'] or 0
-
-    brands = Brand.objects.filter(
-        brand__category_id__in=all_category_ids
-    ).distinct()
+    filters = parse_product_filters(request)
+    facets = compute_facets(base_products, filters)
+    page = paginate_products(
+        request, apply_product_filters(base_products, filters).select_related('cover_image')
+    )
 
     context = {
         'category': category,
-        'products': products,
-        'brands': brands,
-        'max_price': int(max_price),
+        'breadcrumbs': breadcrumbs,
+        'products': attach_available_stock(page['items']),
+        'page': page,
+        'brands': facets['brands'],
+        'facets': facets,
+        'max_price': int(facets['price_max']),
 
         # 🔥 send selected values
-        'selected_status': selected_status,
-        'selected_brands': selected_brands,
-        'selected_rating': selected_rating,
-        'selected_featured': selected_featured,
-        'in_stock': in_stock,
+        'selected_status': filters['status'],
+        'selected_brands': [str(b) for b in filters['brand']],
+        'selected_rating': str(filters['rating'] or ''),
+        'selected_featured': filters['featured'],
+        'in_stock': filters['in_stock'],
     }
 
     return render(request, 'category_products.html', context)
@@ -107,6 +95,7 @@ def product_quickview(request, pk):
 
 def product_detail(request, slug):
     product = get_object_or_404(Product, slug=slug)
+    attach_available_stock([product])
     return render(request, 'product/product_details.html', {'product': product})
 
 # def product_detail(request, pk):
@@ -119,11 +108,39 @@ from django.shortcuts import render, redirect
 from django.forms import modelformset_factory
 from .models import Product, ProductImage
 from .forms import ProductForm, ProductImageFormSet
+from .pagination import keyset_paginate, cursor_url
+from .product_filters import (
+    ADMIN_PRODUCT_SORTS, DEFAULT_ADMIN_PRODUCT_SORT, ADMIN_PRODUCT_PAGE_SIZE,
+    parse_admin_product_filters, filter_admin_products, admin_product_rows, filter_choices, sort_links,
+)
 
 
 def product_list(request):
-    products = Product.objects.all()
-    return render(request, 'admin/product_list.html', {'products': products})
+    filters = parse_admin_product_filters(request.GET)
+
+    # One keyset page over the filtered catalog, list columns only
+    page = keyset_paginate(
+        admin_product_rows(filter_admin_products(filters)),
+        sort=request.GET.get('sort'),
+        cursor=request.GET.get('cursor'),
+        page_size=ADMIN_PRODUCT_PAGE_SIZE,
+        sorts=ADMIN_PRODUCT_SORTS,
+        default_sort=DEFAULT_ADMIN_PRODUCT_SORT,
+    )
+    page['next_url'] = cursor_url(request, page['next_cursor']) if page['next_cursor'] else None
+    page['prev_url'] = cursor_url(request, page['prev_cursor']) if page['prev_cursor'] else None
+
+    categories, brands = filter_choices()
+    return render(request, 'admin/product_list.html', {
+        'products': page['items'],
+        'page': page,
+        'filters': filters,
+        'categories': categories,
+        'brands': brands,
+        'status_choices': Product.STATUS_CHOICES,
+        'sort_links': sort_links(filters, page['sort']),
+        'kpis': dashboard.get_kpis(),
+    })
  
 
 
@@ -245,16 +262,19 @@ def admin_dashboard(request):
     if not request.user.is_superuser:
         return redirect("admin_login")
     
-    products = Product.objects.all()
-
-    product_count = Product.objects.count()
-    category_count = Category.objects.count()
-    brand_count = Brand.objects.count()
+    sales_series = rollups.daily_series(30)
     return render(request, "admin/dashboard.html", {
-        "product_count": product_count,
-        "category_count": category_count,
-        "brand_count": brand_count,
-        'products': products
+        'kpis': dashboard.get_kpis(),
+        'recent_products': dashboard.recent_products(),
+        'low_stock_products': dashboard.low_stock_table(),
+        'sales_series': sales_series,
+        'sales_orders': sum(d['orders'] for d in sales_series),
+        'sales_revenue': sum(d['revenue'] for d in sales_series),
+        'sales_breakdowns': [
+            ('By district', rollups.breakdown('district')),
+            ('By payment method', rollups.breakdown('payment_method')),
+            ('By delivery method', rollups.breakdown('delivery_method')),
+        ],
     })
 
 
@@ -388,32 +408,19 @@ def get_subcategories(request):
 
 
 
-import string
 from django.shortcuts import render
 from .models import Brand
+from .brand_directory import get_brand_directory, LETTERS
 from django.shortcuts import render, redirect, get_object_or_404
 
 
 def brand_index(request):
-    # Letters A-Z
-    letters = list(string.ascii_uppercase)
-    
-    # Special: 0-9 brands
-    digit_brands = Brand.objects.filter(name__regex=r'^[0-9]').order_by('name')
-   
-    # A-Z groups
-    brands_by_letter = {}
-    print(brands_by_letter)
-    for letter in letters:
-        brands_by_letter[letter] = Brand.objects.filter(
-            name__istartswith=letter
-        ).order_by('name')
-    
+    directory = get_brand_directory()
 
     context = {
-        "digits": digit_brands,
-        "letters": letters,
-        "brands_by_letter": brands_by_letter,
+        "digits": directory["digits"],
+        "letters": LETTERS,
+        "brands_by_letter": directory["brands_by_letter"],
     }
     return render(request, "brand/brand_index.html", context) 
     
@@ -421,72 +428,138 @@ def brand_index(request):
 def brand_products(request, brand_id):
     brand = get_object_or_404(Brand, id=brand_id)
 
-    products = Product.objects.filter(
+    base_products = Product.objects.filter(
         brand=brand,
         is_active=True
     )
 
+    filters = parse_product_filters(request)
+    facets = compute_facets(base_products, filters)
+    page = paginate_products(
+        request, apply_product_filters(base_products, filters).select_related('cover_image')
+    )
+
     context = {
         'brand': brand,
-        'products': products
+        'products': attach_available_stock(page['items']),
+        'page': page,
+        'brands': facets['brands'],
+        'facets': facets,
+        'max_price': int(facets['price_max']),
+
+        'selected_status': filters['status'],
+        'selected_brands': [str(b) for b in filters['brand']],
+        'selected_rating': str(filters['rating'] or ''),
+        'selected_featured': filters['featured'],
+        'in_stock': filters['in_stock'],
     }
     return render(request, 'category_products.html', context) 
 
 
 
-def add_to_cart(request, product_id):
-    print("nice")
-    product = get_object_or_404(Product, id=product_id)
-    qty = int(request.GET.get('qty', 1))
-    final_price = float(product.get_discount_price())
+def _cart_delta(summary, **extra):
+    # Only what changed: the touched line(s) plus the running totals
+    return JsonResponse({
+        'cart_qty': summary['qty'],
+        'cart_total': f"৳{summary['total']:,.2f}",
+        **extra,
+    })
 
-    cart = request.session.get('cart', {})
 
-    if str(product_id) in cart:
-        cart[str(product_id)]['qty'] += qty
-    else:
-        cart[str(product_id)] = {
-            'name': product.name,
-            'price': final_price,
-            'qty': qty
-        }
+def _parse_qty(raw):
+    """A cart quantity from user input: an int >= 1, or None."""
+    try:
+        qty = int(raw)
+    except (TypeError, ValueError):
+        return None
+    return qty if qty >= 1 else None
 
-    request.session['cart'] = cart
 
-    # Calculate total quantity and total amount
-    total_qty = sum(item['qty'] for item in cart.values())
-    total_amount = sum(item['qty'] * item['price'] for item in cart.values())
+def add_to_cart(request, product_id):
+    product = get_object_or_404(Product, id=product_id)
+    qty = _parse_qty(request.GET.get('qty', 1))
+    if qty is None:
+        return JsonResponse({'status': 'error', 'message': 'Invalid quantity.'}, status=400)
+
+    cart = get_cart(request, create=True)
+    in_cart = line_qty(cart, [product.id]).get(product.id, 0)
+    short = reserve(cart, {product.id: in_cart + qty})
+    if short:
+        return JsonResponse({
+            'status': 'error',
+            'message': f"Only {short[product.id]} left in stock.",
+        }, status=409)
+    line, summary = add_item(cart, product, qty)
 
     # Return JSON for AJAX popup
-    return JsonResponse({
-        'product_name': product.name,
-        'cart_qty': total_qty,
-        'cart_total': f"৳{total_amount:,.2f}",
-        'cart_items': cart
-    })
-
+    return _cart_delta(summary, product_name=product.name, line=line)
 
 
+@require_POST
+def add_to_cart_batch(request):
+    """
+    Add several products in one round trip (bundles, "buy together").
+    Body: {"items": [{"product_id": 1, "qty": 2}, ...]} or form fields
+    product_id=1&qty=2&product_id=5&qty=1.
+    """
+    quantities = {}
+    try:
+        if request.content_type == 'application/json':
+            pairs = [(i['product_id'], i.get('qty', 1)) for i in json.loads(request.body)['items']]
+        else:
+            ids = request.POST.getlist('product_id')
+            qtys = request.POST.getlist('qty') or ['1'] * len(ids)
+            pairs = zip(ids, qtys)
+        for pk, raw_qty in pairs:
+            pk, qty = int(pk), _parse_qty(raw_qty)
+            if qty is None:
+                raise ValueError(raw_qty)
+            quantities[pk] = quantities.get(pk, 0) + qty
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid items.'}, status=400)
+
+    if not quantities:
+        return JsonResponse({'status': 'error', 'message': 'No items to add.'}, status=400)
+
+    cart = get_cart(request, create=True)
+    in_cart = line_qty(cart, quantities)
+    short = reserve(cart, {pk: in_cart.get(pk, 0) + qty for pk, qty in quantities.items()})
+    if short:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Not enough stock for some items.',
+            'available': short,
+        }, status=409)
+    lines, summary = add_items(cart, quantities)
+    return _cart_delta(summary, lines=lines)
+
+
+def cart_summary_api(request):
+    return _cart_delta(get_summary(request))
 
 
 def cart_view(request):
-    cart = request.session.get('cart', {})
-
-    total = sum(item['price'] * item['qty'] for item in cart.values())
+    cart_obj = get_cart(request)
+    pricing = price_cart(cart_obj)
+    acknowledge_prices(cart_obj, pricing)
 
     return render(request, 'cart/cart.html', {
-        'cart': cart,
-        'total': total
+        'cart': pricing['lines'],
+        'total': pricing['subtotal'],
+        'price_changes': pricing['changed'],
+        'unavailable': pricing['unavailable'],
     })
 
 
 def remove_from_cart(request, product_id):
-    cart = request.session.get('cart', {})
+    cart = get_cart(request)
 
-    if str(product_id) in cart:
-        del cart[str(product_id)]
+    if cart:
+        summary = remove_item(cart, product_id)
+        release(cart, [product_id])
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+            return _cart_delta(summary, line={'product_id': product_id, 'qty': 0, 'removed': True})
 
-    request.session['cart'] = cart
     return redirect('cart_view')
 
 
@@ -494,7 +567,7 @@ def apply_coupon(request):
     code = request.GET.get("code", "").strip()
 
     try:
-        coupon = Coupon.objects.get(code__iexact=code)
+        coupon = Coupon.get_by_code(code)
     except Coupon.DoesNotExist:
         return JsonResponse({"status": "error", "message": "Invalid coupon or gift code."})
 
@@ -511,22 +584,33 @@ def apply_coupon(request):
 
 
 def update_cart(request, key):
-    cart = request.session.get("cart", {})
+    cart = get_cart(request)
     action = request.GET.get("type")
 
-    if key in cart:
+    line, summary = None, None
+
+    if cart and key.isdigit():
 
         if action == "plus":
-            cart[key]["qty"] += 1
+            pid = int(key)
+            in_cart = line_qty(cart, [pid]).get(pid, 0)
+            short = reserve(cart, {pid: in_cart + 1}) if in_cart else {}
+            if short:
+                messages.error(request, f"Only {short[pid]} left in stock.")
+            else:
+                line, summary = change_qty(cart, pid, 1)
 
         elif action == "minus":
-            if cart[key]["qty"] > 1:
-                cart[key]["qty"] -= 1
-            else:
-                # qty 0 hole remove
-                cart.pop(key)
+            # qty 0 hole remove
+            line, summary = change_qty(cart, int(key), -1)
+            if line and line['qty']:
+                reserve(cart, {line['product_id']: line['qty']})
+            elif line:
+                release(cart, [line['product_id']])
+
+    if summary is not None and request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return _cart_delta(summary, line=line)
 
-    request.session["cart"] = cart
     return redirect("cart_view")  
 
 
@@ -778,7 +862,7 @@ from django.contrib.auth import login
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from .forms import GuestCheckoutForm, CheckoutForm
-from .models import Order, OrderItem
+from .models import Order
 
 User = get_user_model()
 
@@ -936,7 +1020,7 @@ def generate_unique_username(model, base):
 
 from django.shortcuts import render, redirect
 from django.contrib.auth import get_user_model, login
-from .models import Order, OrderItem
+from .models import Order
 
 User = get_user_model()
 
@@ -1050,11 +1134,32 @@ def validate_bd_phone(phone):
  
  
 def checkout(request):
-    cart = request.session.get("cart", {})
+    token = (request.POST.get("checkout_token") or "")[:64] if request.method == "POST" else ""
+    if token and Order.objects.filter(checkout_token=token).exists():
+        # Double click / retried POST: the order is already placed
+        return redirect("success_page")
+
+    cart_obj = get_cart(request)
+    # what the order is placed at must never come from a stale cache entry
+    pricing = price_cart(cart_obj, use_cache=False)
+    cart = pricing['lines']
     if not cart:
         return redirect("cart_view")
 
-    subtotal = sum(item["price"] * item["qty"] for item in cart.values())
+    # Prices moved or products were withdrawn since the customer last looked:
+    # send them back to the cart, which shows what changed.
+    if pricing['changed'] or pricing['unavailable']:
+        messages.warning(request, "Some items in your cart changed. Please review them before ordering.")
+        return redirect("cart_view")
+
+    # Entering checkout (re)holds every line for another RESERVATION_TTL_MINUTES
+    short = reserve(cart_obj, {int(pid): line['qty'] for pid, line in cart.items()})
+    if short:
+        names = ', '.join(cart[str(pid)]['name'] for pid in short)
+        messages.error(request, f"Sorry, not enough stock for: {names}. Please update your cart.")
+        return redirect("cart_view")
+
+    subtotal = pricing['subtotal']
 
     if request.method == "POST":
         phone = request.POST.get("phone")
@@ -1082,36 +1187,44 @@ def checkout(request):
         delivery_charge = float(request.POST.get("delivery_charge", 0))
         discount = float(request.POST.get("coupon_discount", 0))
         mobile = request.POST.get("phone") or request.POST.get("phone")
-        order = Order.objects.create(
-            user=request.user,
-            first_name=request.POST.get("first_name"),
-            last_name=request.POST.get("last_name"),
-            address=request.POST.get("address"),
-            mobile=mobile,
-            upazila=request.POST.get("upazila"),
-            district=request.POST.get("district"),
-            email=request.POST.get("email"),
-            comment=request.POST.get("comment"),
-            payment_method=request.POST.get("payment_method"),
-            delivery_method=request.POST.get("delivery_method"),
-            delivery_charge=delivery_charge,
-            subtotal=subtotal,
-            discount=discount,
-            total=subtotal + delivery_charge - discount 
-        )
-
-        for key, item in cart.items():
-            OrderItem.objects.create(
-                order=order,
-                product_name=item["name"],
-                price=item["price"],
-                qty=item["qty"]
+        try:
+            place_order(
+                cart,
+                cart=get_cart(request),
+                user=request.user,
+                first_name=request.POST.get("first_name"),
+                last_name=request.POST.get("last_name"),
+                address=request.POST.get("address"),
+                mobile=mobile,
+                upazila=request.POST.get("upazila"),
+                district=request.POST.get("district"),
+                email=request.POST.get("email"),
+                comment=request.POST.get("comment"),
+                payment_method=request.POST.get("payment_method"),
+                delivery_method=request.POST.get("delivery_method"),
+                delivery_charge=delivery_charge,
+                subtotal=subtotal,
+                discount=discount,
+                total=subtotal + delivery_charge - discount,
+                checkout_token=token or None,
             )
-
-        request.session["cart"] = {}
+        except IntegrityError:
+            # the same token won a race with this request
+            if token and Order.objects.filter(checkout_token=token).exists():
+                return redirect("success_page")
+            raise
+        except OutOfStock as e:
+            messages.error(request, f"Sorry, not enough stock for: {', '.join(e.names)}. Please update your cart.")
+            return redirect("cart_view")
+
+        clear_ordered_items(request, {int(pid): line['qty'] for pid, line in cart.items()})
         return redirect("success_page")
 
-    return render(request, "order/checkout.html", {"cart": cart, "subtotal": subtotal}) 
+    return render(request, "order/checkout.html", {
+        "cart": cart,
+        "subtotal": subtotal,
+        "checkout_token": uuid.uuid4().hex,
+    }) 
 
 def success_page(request):
     return render(request, "order/success.html") 
@@ -1182,4 +1295,92 @@ def success_page(request):
 #     request.session["cart"] = {}
 
 #     # render success
-#     return render(request, "order/success.html", {"order": order})
\ No newline at end of file
+#     return render(request, "order/success.html", {"order": order})
+
+
+from .search import search_products
+
+SEARCH_PAGE_SIZE = 24
+
+
+def _search_page(request):
+    query = request.GET.get("q", "").strip()
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+
+    products, total = search_products(
+        query, offset=(page - 1) * SEARCH_PAGE_SIZE, limit=SEARCH_PAGE_SIZE
+    )
+    num_pages = max((total + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE, 1)
+    return query, page, num_pages, products, total
+
+
+def search(request):
+    query, page, num_pages, products, total = _search_page(request)
+    return render(request, "product/search.html", {
+        "query": query,
+        "products": products,
+        "total": total,
+        "page": page,
+        "num_pages": num_pages,
+        "has_prev": page > 1,
+        "has_next": page < num_pages,
+    })
+
+
+def search_api(request):
+    query, page, num_pages, products, total = _search_page(request)
+    return JsonResponse({
+        "query": query,
+        "total": total,
+        "page": page,
+        "num_pages": num_pages,
+        "results": [
+            {
+                "id": p.id,
+                "name": p.name,
+                "slug": p.slug,
+                "price": float(p.effective_price),
+                "url": reverse("product_detail", args=[p.slug]),
+            }
+            for p in products
+        ],
+    })
+
+
+
+import os
+from django.http import FileResponse, Http404
+from PIL import Image
+from django.core.files.storage import default_storage
+from .images import VARIANTS, variant_path, render_variants
+
+
+def image_variant(request, size, name):
+    """
+    Serve a resized WebP variant, rendering it to disk on first request.
+    Later hits are plain file reads (or served by the web server directly
+    from MEDIA_ROOT/variants/).
+    """
+    if size not in VARIANTS or ".." in name.split("/") or name.startswith("variants/"):
+        raise Http404
+
+    dest = variant_path(name, size)
+    if not os.path.exists(dest):
+        try:
+            src = default_storage.path(name)
+        except Exception:
+            raise Http404
+        if not os.path.exists(src):
+            raise Http404
+        try:
+            render_variants(src, [(dest, VARIANTS[size])])
+        except (OSError, Image.DecompressionBombError):
+            # not an image (or one Pillow refuses to open)
+            raise Http404
+
+    response = FileResponse(open(dest, "rb"), content_type="image/webp")
+    response["Cache-Control"] = "public, max-age=31536000"
+    return response
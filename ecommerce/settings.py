@@ -101,8 +101,14 @@ MIDDLEWARE = [
     
     
     'allauth.account.middleware.AccountMiddleware',
+
+    # EXPLAIN QUERY PLAN logging, only active when QUERY_PLAN_LOGGING = True
+    'core.middleware.QueryPlanMiddleware',
 ]
 
+# Log full table scans / temp B-trees per view (dev only, see core.middleware)
+QUERY_PLAN_LOGGING = False
+
 ROOT_URLCONF = 'ecommerce.urls'
 
 TEMPLATES = [
@@ -117,6 +123,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.categories_menu',
+                'core.context_processors.cart_summary',
             ],
         },
     },
@@ -209,6 +216,23 @@ MEDIA_ROOT = '/home/jisacom/public_html/media'
 STATIC_ROOT = '/home/jisacom/public_html/static'
 MEDIA_URL = '/media/'
 
+# Carts untouched for this many days are removed by `manage.py expire_carts`
+CART_EXPIRY_DAYS = 30
+
+# Stock held for a cart after add to cart / entering checkout (core.inventory).
+# Expired holds are swept by `manage.py release_reservations`.
+RESERVATION_TTL_MINUTES = 15
+
+# Background jobs (core.jobs, run by `manage.py run_jobs`). A job still
+# "running" after this long is assumed orphaned and requeued.
+JOB_LOCK_TIMEOUT_SECONDS = 600
+
+# Order confirmation / payment emails sent by the job worker
+ORDER_EMAILS = False
+
+# Worker processes used to render WebP thumb/card/zoom variants (core.images)
+IMAGE_VARIANT_WORKERS = 2
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field